@@ -0,0 +1,351 @@
+# asgi.py
+"""
+Optional async serving mode:
+
+    uvicorn asgi:app --workers 2
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+
+The I/O-bound endpoints (the public project feed, the contact form and the admin
+contact-submission routes) run as coroutines on an async database driver (asyncpg,
+or aiosqlite for a local SQLite DATABASE_URL), so a worker keeps serving other
+clients while queries wait on the remote database. They are dispatched through the
+Flask app's own URL map, request context, error handlers and after_request hooks
+(CORS, metrics) and share its models and helpers, so responses are the same as
+under gunicorn. Every other route is the unchanged Flask app, run in a thread pool.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.test import EnvironBuilder
+
+import main
+from db_pool import async_database_uri, build_async_engine_options, install_pool_listeners
+from metrics import instrument_engine
+
+# (endpoint, method) -> coroutine function replacing that Flask view under ASGI
+ASYNC_VIEWS = {}
+
+
+def async_view(endpoint, *methods):
+    def decorator(fn):
+        for method in methods:
+            ASYNC_VIEWS[(endpoint, method)] = fn
+        return fn
+    return decorator
+
+
+def get_async_db():
+    return current_app.extensions['async_db']
+
+
+async def verify_admin_jwt():
+    """verify_jwt_in_request off the event loop: a revocation check past the cache may query the database."""
+    await asyncio.to_thread(verify_jwt_in_request)
+
+
+# --- ASGI Application ---
+class AsyncApp:
+    """ASGI app serving ASYNC_VIEWS natively and every other request through the WSGI app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        database_uri = config['ASYNC_DATABASE_URL'] or async_database_uri(config['SQLALCHEMY_DATABASE_URI'])
+        self.engine = create_async_engine(database_uri, **build_async_engine_options(
+            database_uri,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+            pre_ping=config['DB_POOL_PRE_PING'],
+            statement_timeout_ms=config['DB_STATEMENT_TIMEOUT_MS'],
+            connect_timeout=config['DB_CONNECT_TIMEOUT'],
+            pgbouncer=config['DB_PGBOUNCER'],
+        ))
+        install_pool_listeners(
+            self.engine.sync_engine,
+            statement_timeout_ms=config['DB_STATEMENT_TIMEOUT_MS'],
+            pgbouncer=config['DB_PGBOUNCER'],
+        )
+        instrument_engine(self.engine.sync_engine)
+        # Objects are serialized after commit; expiring them would need a (blocking) refresh.
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._feed_build_locks = {}  # cache key -> [lock, tasks using it]
+        self.wsgi = WSGIMiddleware(flask_app, workers=config['ASGI_SYNC_WORKERS'])
+        # The WSGI fallback goes through the app's own ProxyFix; apply the same to native views.
+        self.proxy_fix = (
+            ProxyFix(lambda environ, start_response: environ, x_for=config['PROXY_FIX_X_FOR'])
+            if config['PROXY_FIX_X_FOR'] else None
+        )
+        flask_app.extensions['async_db'] = self
+
+    @asynccontextmanager
+    async def feed_single_flight(self, key):
+        """Per-key single-flight rebuilds of the project feed, like ProjectFeedCache.single_flight."""
+        holder = self._feed_build_locks.setdefault(key, [asyncio.Lock(), 0])
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                yield
+        finally:
+            holder[1] -= 1
+            if not holder[1]:
+                del self._feed_build_locks[key]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        view = self._match(scope) if scope['type'] == 'http' else None
+        if view is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        environ = build_environ(scope, await read_body(receive))
+        if self.proxy_fix:
+            environ = self.proxy_fix(environ, None)
+        with self.flask_app.request_context(environ):
+            response = await self._full_dispatch(view)
+        # The WSGI view of the response drops bodies of 304s and HEAD requests and fixes up headers.
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+            await send({'type': 'http.response.body', 'body': b''.join(app_iter)})
+        finally:
+            response.close()
+
+    def _match(self, scope):
+        try:
+            endpoint, _ = self.flask_app.url_map.bind('').match(scope['path'], method=scope['method'])
+        except HTTPException:
+            return None  # 404s, 405s and redirects come from the Flask app as usual
+        return ASYNC_VIEWS.get((endpoint, scope['method']))
+
+    async def _full_dispatch(self, view):
+        """Flask.full_dispatch_request for a coroutine view."""
+        app = self.flask_app
+        try:
+            try:
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await view(**request.view_args)
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+            return app.finalize_request(rv)
+        except Exception as e:
+            return app.handle_exception(e)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] != 'http.request':
+            break  # client went away; the view still runs to completion
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope, so the request runs in a regular Flask request context."""
+    headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+    host = next((value for name, value in headers if name.lower() == 'host'), None)
+    if host is None and scope.get('server'):
+        host = '%s:%s' % scope['server']
+    builder = EnvironBuilder(
+        path=scope['path'],
+        base_url=f"{scope.get('scheme', 'http')}://{host or 'localhost'}",
+        query_string=scope['query_string'].decode('latin-1'),
+        method=scope['method'],
+        headers=headers,
+        data=body,
+        environ_overrides={
+            'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        },
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+# --- Async Views ---
+@async_view('api.get_public_projects_api', 'GET')
+async def get_public_projects_api():
+    current_app.logger.info("Public request to /api/projects")
+    options, errors = main.parse_project_listing_args(request.args)
+    if errors:
+        return jsonify({"message": "Invalid query parameters", "errors": errors}), 400
+
+    feed_cache = main.get_project_feed_cache()
+    cache_key = main.public_projects_cache_key(options)
+
+    async def build_feed_body():
+        async with get_async_db().sessions() as session:
+            result = await session.execute(main.project_listing_statement(
+                **options, dialect=get_async_db().engine.dialect.name
+            ))
+            rows, next_cursor = main.paginate_projects(result.all(), options['limit'])
+        return jsonify(main.serialize_project_listing(rows, next_cursor, options)).get_data()
+
+    try:
+        feed, _ = feed_cache.lookup(cache_key)
+        if feed is None and cache_key is None:
+            feed = feed_cache.make_entry(await build_feed_body())
+        elif feed is None:
+            async with get_async_db().feed_single_flight(cache_key):
+                feed, generation = feed_cache.lookup(cache_key)
+                if feed is None:
+                    feed = feed_cache.store(cache_key, await build_feed_body(), generation)
+    except Exception as e:
+        current_app.logger.error(f"Error fetching public projects: {e}", exc_info=True)
+        return jsonify({"message": "Could not retrieve projects", "error_details": str(e)}), 500
+
+    return main.project_feed_response(feed)
+
+
+@async_view('api.handle_form_submit', 'POST')
+async def handle_form_submit():
+    if not request.is_json:
+        return jsonify({"message": "Request must be JSON"}), 400
+
+    data = request.get_json()
+    errors = main.contact_form_errors(data)
+    if errors:
+        return jsonify({"message": "Validation errors", "errors": errors}), 422
+
+    screened = await asyncio.to_thread(main.screen_contact_submission, data)
+    if screened is not None:
+        return screened
+
+    if main.get_submission_buffer() is not None:
+        try:
+            submission = await asyncio.to_thread(main.buffer_contact_submission, data)
+        except Exception as e:
+            main.release_contact_submission(data)
+            current_app.logger.error(f"Error buffering form submission: {e}", exc_info=True)
+            return jsonify({"message": "An unexpected error occurred while processing the form.", "error_details": str(e)}), 500
+        current_app.logger.info(f"Buffered contact form submission from {submission.name} ({submission.email}).")
+        return jsonify({"message": "Form submitted successfully!", "submission": submission.to_dict()}), 202
+
+    try:
+        new_submission = main.ContactSubmission(
+            name=data.get('name'),
+            email=data.get('email'),
+            phone=data.get('phone'),
+            message=data.get('message'),
+        )
+        async with get_async_db().sessions() as session:
+            session.add(new_submission)
+            await session.commit()
+            # Reload as stored, like the sync view's post-commit access does.
+            await session.refresh(new_submission)
+        current_app.logger.info(f"New contact form submission from {new_submission.name} ({new_submission.email}).")
+
+        email_queued = main.send_notification_email(new_submission)
+
+        response_data = {
+            "message": "Form submitted successfully!",
+            "submission": new_submission.to_dict()
+        }
+        if current_app.debug:
+            response_data["email_notification_queued"] = email_queued
+
+        return jsonify(response_data), 201
+
+    except IntegrityError as e:
+        main.release_contact_submission(data)
+        current_app.logger.error(f"Database integrity error on form submission: {e}", exc_info=True)
+        return jsonify({"message": "Could not process form due to a database conflict.", "error_details": str(e.orig)}), 409
+    except Exception as e:
+        main.release_contact_submission(data)
+        current_app.logger.error(f"Error processing form submission: {e}", exc_info=True)
+        return jsonify({"message": "An unexpected error occurred while processing the form.", "error_details": str(e)}), 500
+
+
+@async_view('api.admin_get_contact_submissions', 'GET')
+async def admin_get_contact_submissions():
+    await verify_admin_jwt()
+    current_user_id = get_jwt_identity()
+    current_app.logger.info(f"Admin user {current_user_id} fetching contact submissions.")
+
+    options, errors = main.parse_contact_submission_listing_args(request.args)
+    if errors:
+        return jsonify({"message": "Invalid query parameters", "errors": errors}), 400
+
+    try:
+        dialect = get_async_db().engine.dialect.name
+        count_statement, total_estimated = main.contact_submissions_count_statement(options, dialect)
+        async with get_async_db().sessions() as session:
+            total = await session.scalar(count_statement) if count_statement is not None else None
+            result = await session.execute(main.contact_submissions_page_statement(options, dialect))
+            rows = result.all()
+        return jsonify(main.contact_submission_listing_payload(rows, total, options, total_estimated)), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching contact submissions: {e}", exc_info=True)
+        return jsonify({"message": "Could not retrieve submissions", "error_details": str(e)}), 500
+
+
+@async_view('api.admin_get_contact_submission', 'GET')
+async def admin_get_contact_submission(submission_id):
+    await verify_admin_jwt()
+    async with get_async_db().sessions() as session:
+        submission = await session.get(main.ContactSubmission, submission_id)
+
+    if not submission:
+        return jsonify({"message": "Submission not found"}), 404
+
+    return jsonify(submission.to_dict()), 200
+
+
+@async_view('api.admin_delete_contact_submission', 'DELETE')
+async def admin_delete_contact_submission(submission_id):
+    await verify_admin_jwt()
+    current_user_id = get_jwt_identity()
+    async with get_async_db().sessions() as session:
+        submission = await session.get(main.ContactSubmission, submission_id)
+
+        if not submission:
+            return jsonify({"message": "Submission not found"}), 404
+
+        try:
+            await session.delete(submission)
+            await session.commit()
+            current_app.logger.info(f"Contact submission ID {submission_id} deleted by admin {current_user_id}.")
+            return jsonify({"message": "Submission deleted successfully"}), 200
+        except Exception as e:
+            await session.rollback()
+            current_app.logger.error(f"Error deleting submission ID {submission_id}: {e}", exc_info=True)
+            return jsonify({"message": "Failed to delete submission", "error_details": str(e)}), 500
+
+
+def create_asgi_app(flask_app=None):
+    return AsyncApp(flask_app or main.app)
+
+
+app = create_asgi_app()
@@ -0,0 +1,211 @@
+# auth_tokens.py
+"""
+Admin token handling on top of flask_jwt_extended: a per-process cache of verified
+tokens, and revocation (logout, refresh token rotation) through a blocklist of token
+ids (jti) checked by the token_in_blocklist_loader on every protected request.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import current_app
+from flask_jwt_extended import JWTManager
+from sqlalchemy.exc import IntegrityError
+
+from metrics import metrics
+
+
+# --- Verification Cache ---
+class VerifiedTokenCache:
+    """
+    LRU of encoded token -> verified claims. Keyed by the whole token, not just its
+    signature, so a cached signature can never vouch for a different payload. Entries
+    stop being used once the token expires.
+    """
+
+    def __init__(self, max_entries=256, leeway=0):
+        self.max_entries = max_entries
+        self.leeway = leeway
+        self._entries = OrderedDict()  # token -> (claims, expires_at or None)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at is not None and time.time() > expires_at:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token, claims):
+        expires_at = claims['exp'] + self.leeway if claims.get('exp') else None
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CachingJWTManager(JWTManager):
+    """
+    JWTManager that skips decoding and the signature check for tokens the app's
+    VerifiedTokenCache (app.extensions['jwt_verify_cache']) has already verified.
+    Type, freshness and revocation checks still run on every request.
+
+    The public loaders (decode_key_loader, token_verification_loader) run around the
+    decode rather than replacing it, so this overrides the private _decode_jwt_from_config;
+    requirements.txt pins flask-jwt-extended to the 4.7 series it was written against.
+    """
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        cache = current_app.extensions.get('jwt_verify_cache')
+        if cache is None or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        claims = cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            cache.put(encoded_token, claims)
+        return dict(claims)
+
+
+# --- Revocation ---
+class MemoryTokenBlocklist:
+    """Revoked jtis in this process (jti -> exp), pruned of expired entries as new ones arrive."""
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        with self._lock:
+            self._revoked[jti] = expires_at
+            for expired in [key for key, exp in self._revoked.items() if exp is not None and exp < now]:
+                del self._revoked[expired]
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+
+class RedisTokenBlocklist:
+    """Revoked jtis as Redis keys that expire together with their token."""
+
+    def __init__(self, client, key_prefix='revoked-jwt'):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def revoke(self, jti, expires_at):
+        ttl = int(expires_at - time.time()) + 1 if expires_at else None
+        if ttl is None or ttl > 0:
+            self.client.set(f"{self.key_prefix}:{jti}", 1, ex=ttl)
+
+    def is_revoked(self, jti):
+        return bool(self.client.exists(f"{self.key_prefix}:{jti}"))
+
+
+class DatabaseTokenBlocklist:
+    """Revoked jtis in the revoked_tokens table (primary key lookups), shared by every worker."""
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def revoke(self, jti, expires_at):
+        session = self.db.session
+        expires = datetime.fromtimestamp(expires_at, timezone.utc) if expires_at else datetime.max
+        session.execute(self.db.delete(self.model).where(self.model.expires_at < datetime.now(timezone.utc)))
+        session.add(self.model(jti=jti, expires_at=expires))
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()  # already revoked
+
+    def is_revoked(self, jti):
+        try:
+            return self.db.session.get(self.model, jti) is not None
+        except Exception:
+            self.db.session.rollback()
+            raise
+
+
+class TokenBlocklist:
+    """
+    Revocation list with an in-process layer in front of a shared backend: revocations
+    are written to both, a jti found revoked is remembered locally, and a jti found not
+    revoked isn't asked about again for cache_seconds (so a logout in another worker takes
+    effect there within that time). If the shared backend can't be reached the token is
+    treated as revoked, logged and counted in token_revocation_check_failures_total.
+    """
+
+    def __init__(self, shared=None, logger=None, cache_seconds=0, max_cached=1024):
+        self.local = MemoryTokenBlocklist()
+        self.shared = shared
+        self.logger = logger
+        self.cache_seconds = cache_seconds
+        self.max_cached = max_cached
+        self._not_revoked = OrderedDict()  # jti -> time the shared backend last said so
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        self.local.revoke(jti, expires_at)
+        if self.shared is not None:
+            self.shared.revoke(jti, expires_at)
+
+    def _recently_checked(self, jti):
+        with self._lock:
+            checked_at = self._not_revoked.get(jti)
+            if checked_at is None:
+                return False
+            if time.monotonic() - checked_at >= self.cache_seconds:
+                del self._not_revoked[jti]
+                return False
+            return True
+
+    def _remember_not_revoked(self, jti):
+        with self._lock:
+            self._not_revoked[jti] = time.monotonic()
+            self._not_revoked.move_to_end(jti)
+            while len(self._not_revoked) > self.max_cached:
+                self._not_revoked.popitem(last=False)
+
+    def is_revoked(self, jti, expires_at=None):
+        if self.local.is_revoked(jti):
+            return True
+        if self.shared is None or (self.cache_seconds > 0 and self._recently_checked(jti)):
+            return False
+        try:
+            revoked = self.shared.is_revoked(jti)
+        except Exception as e:
+            metrics.count_revocation_check_failure(type(self.shared).__name__)
+            if self.logger:
+                self.logger.error(f"Token revocation check failed, rejecting token: {e}", exc_info=True)
+            return True
+        if revoked:
+            self.local.revoke(jti, expires_at)
+        elif self.cache_seconds > 0:
+            self._remember_not_revoked(jti)
+        return revoked
+
+
+def create_token_blocklist(config, db=None, model=None, logger=None):
+    backend = config['JWT_BLOCKLIST_BACKEND']
+    cache_seconds = config['JWT_BLOCKLIST_CACHE_SECONDS']
+    if backend == 'memory':
+        return TokenBlocklist(logger=logger)
+    if backend == 'database':
+        return TokenBlocklist(DatabaseTokenBlocklist(db, model), logger=logger, cache_seconds=cache_seconds)
+    if backend == 'redis':
+        import redis  # Optional dependency, only needed for JWT_BLOCKLIST_BACKEND=redis
+        client = redis.Redis.from_url(
+            config['JWT_BLOCKLIST_REDIS_URL'], socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        return TokenBlocklist(RedisTokenBlocklist(client), logger=logger, cache_seconds=cache_seconds)
+    if backend == 'fakeredis':
+        import fakeredis  # In-process Redis for local runs
+        return TokenBlocklist(RedisTokenBlocklist(fakeredis.FakeRedis()), logger=logger, cache_seconds=cache_seconds)
+    raise ValueError(f"Unknown JWT_BLOCKLIST_BACKEND '{backend}'")
@@ -0,0 +1,333 @@
+# benchmarks/bench_api.py
+"""
+Load test for the backend API against a local database, with emails kept in memory.
+
+Seeds N projects and M contact submissions, serves the app from a threaded local
+HTTP server and drives each scenario with concurrent keep-alive clients. Latency
+percentiles and throughput are printed (or written with --output) as JSON so runs
+can be compared across commits.
+
+    python benchmarks/bench_api.py --projects 500 --submissions 5000 --concurrency 16
+    python benchmarks/bench_api.py --database-url postgresql+psycopg2://localhost/bench
+    python benchmarks/bench_api.py --server asgi   # async mode (asgi.py) under uvicorn
+"""
+import argparse
+import http.client
+import io
+import json
+import logging
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_USERNAME = 'bench-admin'
+ADMIN_PASSWORD = 'bench-password'
+SCENARIOS = ['public_projects', 'public_projects_page', 'form_submit', 'admin_contact_submissions', 'admin_upload']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', type=int, default=200, help="projects to seed")
+    parser.add_argument('--submissions', type=int, default=1000, help="contact submissions to seed")
+    parser.add_argument('--requests', type=int, default=500, help="requests per scenario")
+    parser.add_argument('--upload-requests', type=int, default=50, help="requests for the upload scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent clients")
+    parser.add_argument('--warmup', type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument('--database-url', help="local database to use; its projects and submissions are deleted "
+                                               "(default: a fresh SQLite file)")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="comma-separated subset of scenarios")
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                        help="threaded WSGI server, or uvicorn with the async views of asgi.py")
+    parser.add_argument('--image-processing', action='store_true', help="re-encode uploads (needs Pillow)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+# --- Setup ---
+def create_bench_app(args, work_dir):
+    database_url = args.database_url or f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    # main builds its module-level app on import, so point it at the local database first.
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['EMAIL_PROVIDER'] = 'memory'
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    app = main.create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'UPLOAD_FOLDER': os.path.join(work_dir, 'uploads'),
+        'UPLOAD_SCRATCH_FOLDER': '',  # next to the uploads, inside work_dir
+        'STORAGE_BACKEND': 'local',
+        'IMAGE_PROCESSING': args.image_processing,
+        'SLOW_REQUEST_MS': 60000,
+        # Form tokens are minted right before each submission (see build_scenarios).
+        'SPAM_MIN_FILL_SECONDS': 0,
+        # Every benchmark client shares 127.0.0.1, so per-IP limits would throttle the run.
+        'RATE_LIMIT_ENABLED': False,
+    })
+    return main, app
+
+
+def seed(main, app, projects, submissions):
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade(main.db.engine, log=lambda message: None)
+        main.db.session.execute(main.ContactSubmission.__table__.delete())
+        main.db.session.execute(main.Project.__table__.delete())
+        main.db.session.execute(main.AdminUser.__table__.delete().where(main.AdminUser.username == ADMIN_USERNAME))
+        admin = main.AdminUser(username=ADMIN_USERNAME)
+        admin.set_password(ADMIN_PASSWORD)
+        main.db.session.add(admin)
+
+        now = datetime.now(timezone.utc)
+        main.db.session.execute(main.Project.__table__.insert(), [
+            {
+                'name': f"Project {i}",
+                'description': f"Benchmark project {i}. " * 20,
+                'project_url': f"https://example.com/projects/{i}",
+                'image_filename': None,
+                'date_added': now - timedelta(minutes=i),
+            }
+            for i in range(projects)
+        ])
+        main.db.session.execute(main.ContactSubmission.__table__.insert(), [
+            {
+                'name': f"Visitor {i}",
+                'email': f"visitor{i}@example.com",
+                'phone': None,
+                'message': f"Benchmark message {i}. " * 10,
+                'submission_date': now - timedelta(minutes=i),
+            }
+            for i in range(submissions)
+        ])
+        main.db.session.commit()
+
+
+def start_server(app):
+    """Serves app from a background thread. Returns (port, stop)."""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server.server_port, server.shutdown
+
+
+def start_asgi_server(app):
+    import socket
+    import uvicorn
+    import asgi
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    server = uvicorn.Server(uvicorn.Config(asgi.create_asgi_app(app), log_level='error', lifespan='on'))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return sock.getsockname()[1], stop
+
+
+def sample_image():
+    try:
+        from PIL import Image
+    except ImportError:
+        # 1x1 transparent PNG
+        return bytes.fromhex(
+            '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+            '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+        )
+    buffer = io.BytesIO()
+    Image.new('RGB', (1600, 1200), (40, 90, 160)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+# --- Scenarios ---
+def build_scenarios(token, image, spam_filter=None):
+    auth = {'Authorization': f'Bearer {token}'}
+
+    def public_projects(i):
+        return 'GET', '/api/projects', None, {}
+
+    def public_projects_page(i):
+        return 'GET', '/api/projects?limit=20&fields=id,name,image_url,srcset', None, {}
+
+    def form_submit(i):
+        body = json.dumps({
+            'name': f"Load {i}", 'email': f"load{i}@example.com", 'message': f"Benchmark submission {i}",
+            # A fresh single-use token, so submissions take the accepted path rather than the spam one.
+            'form_token': spam_filter.issue_token() if spam_filter else None,
+        }).encode()
+        return 'POST', '/api/form_submit', body, {'Content-Type': 'application/json'}
+
+    def admin_contact_submissions(i):
+        return 'GET', f'/api/admin/contact-submissions?page={i % 10 + 1}&per_page=20', None, auth
+
+    def admin_upload(i):
+        # Vary the bytes so content-hash dedup doesn't turn uploads into no-ops.
+        body, content_type = multipart(
+            {'name': f"Upload {i}", 'description': "Benchmark upload"},
+            {'image': (f"upload{i}.jpg", image + uuid.uuid4().bytes, 'image/jpeg')},
+        )
+        return 'POST', '/api/admin/projects', body, {**auth, 'Content-Type': content_type}
+
+    return {
+        'public_projects': public_projects,
+        'public_projects_page': public_projects_page,
+        'form_submit': form_submit,
+        'admin_contact_submissions': admin_contact_submissions,
+        'admin_upload': admin_upload,
+    }
+
+
+def login(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port)
+    conn.request('POST', '/api/admin/login', json.dumps({'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD}),
+                 {'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"Benchmark login failed: {response.status} {data}")
+    return data['access_token']
+
+
+def run_scenario(port, build_request, total, concurrency, warmup):
+    local = threading.local()
+
+    def send(i):
+        if not hasattr(local, 'conn'):
+            local.conn = http.client.HTTPConnection('127.0.0.1', port)
+        method, path, body, headers = build_request(i)
+        start = time.perf_counter()
+        try:
+            local.conn.request(method, path, body, headers)
+            response = local.conn.getresponse()
+            response.read()
+            status = response.status
+        except (http.client.HTTPException, OSError):
+            local.conn.close()
+            del local.conn
+            status = 0
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(warmup)))
+        started = time.perf_counter()
+        results = list(pool.map(send, range(warmup, warmup + total)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'duration_seconds': round(elapsed, 4),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'mean': round(statistics.fmean(latencies) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        },
+        'status_counts': statuses,
+    }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix='portfolio-bench-')
+    try:
+        backend, app = create_bench_app(args, work_dir)
+        seed(backend, app, args.projects, args.submissions)
+        port, stop_server = (start_asgi_server if args.server == 'asgi' else start_server)(app)
+        try:
+            requests = build_scenarios(login(port), sample_image(), app.extensions.get('spam_filter'))
+            results = {}
+            for name in scenarios:
+                total = args.upload_requests if name == 'admin_upload' else args.requests
+                warmup = min(args.warmup, total) if name != 'admin_upload' else 0
+                results[name] = run_scenario(port, requests[name], total, args.concurrency, warmup)
+        finally:
+            stop_server()
+            app.extensions['image_executor'].shutdown(wait=True)
+            app.extensions['email_dispatcher'].shutdown()
+
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': app.config['SQLALCHEMY_DATABASE_URI'].split('://', 1)[0],
+            'server': args.server,
+            'seed': {'projects': args.projects, 'submissions': args.submissions},
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + '\n')
+        else:
+            print(output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+# benchmarks/bench_serialization.py
+"""
+Times building the JSON body of a large project listing, the work behind a cache miss
+of /api/projects, with the query, serialization and encoding strategies side by side:
+
+    orm_to_dict_stdlib   Project objects, to_dict() per row, standard library encoder
+    orm_to_dict_orjson   Project objects, to_dict() per row, orjson
+    rows_stdlib          column rows through project_serializer(), standard library encoder
+    rows_orjson          column rows through project_serializer(), orjson (what the app does)
+
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 7
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help="projects to seed and list")
+    parser.add_argument('--repeat', type=int, default=7, help="timed runs per strategy (median is reported)")
+    parser.add_argument('--fields', help="comma-separated ?fields= projection (default: all fields)")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def create_bench_app(work_dir):
+    database_url = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['EMAIL_PROVIDER'] = 'memory'
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    app = main.create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'UPLOAD_FOLDER': os.path.join(work_dir, 'uploads'),
+        'STORAGE_BACKEND': 'local',
+    })
+    return main, app
+
+
+def seed(main, app, rows):
+    import migrations
+
+    with app.app_context():
+        migrations.upgrade(main.db.engine, log=lambda message: None)
+        now = datetime.now(timezone.utc)
+        main.db.session.execute(main.Project.__table__.insert(), [
+            {
+                'name': f"Project {i}",
+                'description': f"Benchmark project {i}. " * 20,
+                'project_url': f"https://example.com/projects/{i}",
+                'image_filename': f"{i:032x}.png",
+                'image_variants': {'320': f"{i:032x}_320w.webp", '640': f"{i:032x}_640w.webp"},
+                'date_added': now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        main.db.session.commit()
+
+
+def build_strategies(main, fields):
+    from flask import jsonify, request
+    from flask.json.provider import DefaultJSONProvider
+    from json_provider import OrjsonJSONProvider
+
+    def orm_to_dict():
+        # The listing as it was before column rows: hydrate every Project, url_for per image.
+        projects = main.db.session.execute(
+            main.db.select(main.Project).order_by(main.Project.date_added.desc(), main.Project.id.desc())
+        ).scalars().all()
+        return [p.to_dict(include_image_url_base=request.host_url, fields=fields) for p in projects]
+
+    def rows():
+        options = {'limit': None, 'cursor': None, 'fields': fields, 'q': None}
+        return main.serialize_project_listing(*main.list_projects(**options), options)
+
+    return {
+        'orm_to_dict_stdlib': (orm_to_dict, DefaultJSONProvider),
+        'orm_to_dict_orjson': (orm_to_dict, OrjsonJSONProvider),
+        'rows_stdlib': (rows, DefaultJSONProvider),
+        'rows_orjson': (rows, OrjsonJSONProvider),
+    }, jsonify
+
+
+def run_strategy(app, build_payload, provider_class, jsonify, repeat):
+    app.json = provider_class(app)
+    timings = []
+    body = b''
+    for _ in range(repeat + 1):  # the first run warms caches and is not counted
+        with app.test_request_context('/api/projects'):
+            start = time.perf_counter()
+            body = jsonify(build_payload()).get_data()
+            timings.append(time.perf_counter() - start)
+            app.extensions['sqlalchemy'].session.remove()
+    timings = timings[1:]
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+        'body_bytes': len(body),
+    }, body
+
+
+def main():
+    args = parse_args()
+    fields = frozenset(f.strip() for f in args.fields.split(',')) if args.fields else None
+    work_dir = tempfile.mkdtemp(prefix='portfolio-bench-')
+    try:
+        backend, app = create_bench_app(work_dir)
+        seed(backend, app, args.rows)
+        strategies, jsonify = build_strategies(backend, fields)
+        results = {}
+        bodies = {}
+        for name, (build_payload, provider_class) in strategies.items():
+            results[name], bodies[name] = run_strategy(app, build_payload, provider_class, jsonify, args.repeat)
+        baseline = results['orm_to_dict_stdlib']['median_ms']
+        for result in results.values():
+            result['speedup'] = round(baseline / result['median_ms'], 2) if result['median_ms'] else None
+
+        report = {
+            'rows': args.rows,
+            'fields': sorted(fields) if fields else None,
+            'identical_output': len({json.dumps(json.loads(body), sort_keys=True) for body in bodies.values()}) == 1,
+            'strategies': results,
+        }
+        output = json.dumps(report, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + '\n')
+        else:
+            print(output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
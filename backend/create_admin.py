@@ -1,7 +1,6 @@
 # create_admin.py
 from dotenv import load_dotenv
-from app import create_app, db # Import create_app and db instance
-from app.models import AdminUser # Import AdminUser model
+from main import create_app, db, AdminUser # App factory, db instance and AdminUser model
 import os
 import sys
 
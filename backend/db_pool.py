@@ -0,0 +1,167 @@
+# db_pool.py
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+class PoolStats:
+    """Process-wide counters for the SQLAlchemy connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                'checkouts': self.checkouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'pool_class': type(pool).__name__,
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            })
+        elif pool is not None:
+            data['pool_class'] = type(pool).__name__
+        return data
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited (including opening new connections)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - start)
+
+
+def build_engine_options(database_uri, pool_size=5, max_overflow=10, pool_timeout=10,
+                         pool_recycle=1800, pre_ping=True, statement_timeout_ms=0,
+                         connect_timeout=10, pgbouncer=False):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the given database. Postgres gets a bounded, pre-pinged
+    pool with TCP keepalives and a server-side statement timeout. In PgBouncer mode
+    (transaction pooling) pooling is left to PgBouncer and the timeout is applied per
+    transaction instead of per connection.
+    """
+    if not database_uri.startswith('postgresql'):
+        return {}
+
+    connect_args = {
+        'connect_timeout': connect_timeout,
+        'keepalives': 1,
+        'keepalives_idle': 30,
+        'keepalives_interval': 10,
+        'keepalives_count': 3,
+    }
+    if pgbouncer:
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    if statement_timeout_ms:
+        connect_args['options'] = f"-c statement_timeout={int(statement_timeout_ms)}"
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pre_ping,
+        'connect_args': connect_args,
+    }
+
+
+def async_database_uri(database_uri):
+    """
+    The async-driver equivalent of a SQLAlchemy database URI: asyncpg for Postgres,
+    aiosqlite for SQLite. libpq's sslmode becomes asyncpg's ssl parameter.
+    """
+    url = make_url(database_uri)
+    backend = url.get_backend_name()
+    if backend == 'postgresql':
+        query = dict(url.query)
+        if 'sslmode' in query:
+            query['ssl'] = query.pop('sslmode')
+        return url.set(drivername='postgresql+asyncpg', query=query).render_as_string(hide_password=False)
+    if backend == 'sqlite':
+        return url.set(drivername='sqlite+aiosqlite').render_as_string(hide_password=False)
+    raise ValueError(f"No async driver configured for '{backend}' databases")
+
+
+def build_async_engine_options(database_uri, pool_size=5, max_overflow=10, pool_timeout=10,
+                               pool_recycle=1800, pre_ping=True, statement_timeout_ms=0,
+                               connect_timeout=10, pgbouncer=False):
+    """
+    create_async_engine() options mirroring build_engine_options() for asyncpg. Under
+    PgBouncer, asyncpg's prepared statement caches are disabled since consecutive
+    statements can land on different server connections.
+    """
+    if not database_uri.startswith('postgresql'):
+        return {}
+
+    connect_args = {'timeout': connect_timeout}
+    if pgbouncer:
+        connect_args['statement_cache_size'] = 0
+        connect_args['prepared_statement_cache_size'] = 0
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    if statement_timeout_ms:
+        connect_args['server_settings'] = {'statement_timeout': str(int(statement_timeout_ms))}
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pre_ping,
+        'connect_args': connect_args,
+    }
+
+
+def install_pool_listeners(engine, statement_timeout_ms=0, pgbouncer=False):
+    """Hooks pool_stats into the engine and, under PgBouncer, sets the statement timeout per transaction."""
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats.record_connect()
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_stats.record_invalidation()
+
+    if pgbouncer and statement_timeout_ms and engine.dialect.name == 'postgresql':
+        @event.listens_for(engine, 'begin')
+        def on_begin(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
@@ -0,0 +1,57 @@
+# images.py
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it uploads are served as-is
+    Image = None
+
+
+def image_processing_available():
+    return Image is not None
+
+
+def variant_filename(stem, width):
+    return f"{stem}_{width}w.webp"
+
+
+def process_image(source_path, output_dir, stem, widths=(320, 640, 1280), max_dimension=1920, quality=80):
+    """
+    Re-encodes an uploaded image to WebP without its metadata (EXIF, GPS, ICC),
+    capped to max_dimension on the longest side, plus one narrower copy per width.
+
+    Returns (main_filename, {width: filename}) with the main image included in the
+    variants, or None if the image is animated and should be kept untouched.
+    Written files are removed again on failure.
+    """
+    written = []
+    try:
+        with Image.open(source_path) as img:
+            if getattr(img, 'is_animated', False):
+                return None
+            # Apply the EXIF rotation before the metadata is dropped.
+            img = ImageOps.exif_transpose(img)
+            img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+            main_filename = variant_filename(stem, img.width)
+            img.save(os.path.join(output_dir, main_filename), 'WEBP', quality=quality, method=4)
+            written.append(main_filename)
+
+            variants = {img.width: main_filename}
+            for width in sorted(widths):
+                if width >= img.width:
+                    break
+                height = round(img.height * width / img.width)
+                filename = variant_filename(stem, width)
+                img.resize((width, height), Image.LANCZOS).save(
+                    os.path.join(output_dir, filename), 'WEBP', quality=quality, method=4
+                )
+                written.append(filename)
+                variants[width] = filename
+            return main_filename, variants
+    except Exception:
+        for filename in written:
+            try: os.remove(os.path.join(output_dir, filename))
+            except OSError: pass
+        raise
@@ -0,0 +1,45 @@
+# json_provider.py
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; JSON_PROVIDER=orjson falls back to the standard library
+    orjson = None
+
+
+def orjson_available():
+    return orjson is not None
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson. Output follows the default provider
+    (sorted keys, compact unless debugging, trailing newline on responses, HTTP dates
+    for datetimes, the same fallbacks in default()), except that non-ASCII text is
+    emitted as UTF-8 instead of \\u escapes. Calls with stdlib-specific keyword
+    arguments are passed on to the default provider.
+    """
+
+    def _options(self, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
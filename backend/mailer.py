@@ -0,0 +1,129 @@
+# mailer.py
+import queue
+import threading
+import time
+import logging
+
+import resend
+
+
+# --- Email Providers ---
+class EmailProvider:
+    """Interface for anything that can deliver a notification email."""
+
+    def send(self, message):
+        """Deliver message ({"from", "to", "subject", "html"}). Raise on failure."""
+        raise NotImplementedError
+
+
+class ResendEmailProvider(EmailProvider):
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    def send(self, message):
+        resend.api_key = self.api_key
+        resend.Emails.send(message)
+
+
+class InMemoryEmailProvider(EmailProvider):
+    """
+    Local stand-in for Resend: keeps every message in `sent` instead of delivering it.
+    `fail_times` makes the next N sends raise, to exercise the retry path.
+    """
+
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("Simulated email provider failure")
+            self.sent.append(message)
+
+
+# --- Background Dispatch ---
+class EmailDispatcher:
+    """
+    Bounded background queue that delivers emails from worker threads, retrying
+    failed sends with exponential backoff. Workers start on the first enqueue so
+    each gunicorn worker process gets its own threads after forking. on_send, if
+    given, is called with the duration in seconds of every send attempt.
+    """
+
+    _STOP = object()
+
+    def __init__(self, provider, max_queue=100, workers=2, max_attempts=4,
+                 backoff_seconds=2.0, logger=None, on_send=None):
+        self.provider = provider
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.on_send = on_send
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"email-dispatch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, message):
+        """Queue message for delivery. Returns False (and drops it) if the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.logger.error(f"Email queue full; dropping notification '{message.get('subject')}'")
+            return False
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            try:
+                if message is self._STOP:
+                    return
+                self._deliver(message)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, message):
+        for attempt in range(1, self.max_attempts + 1):
+            start = time.perf_counter()
+            try:
+                self.provider.send(message)
+                self.logger.info(f"Notification email '{message.get('subject')}' sent (attempt {attempt}).")
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.logger.error(f"Giving up on email '{message.get('subject')}' after {attempt} attempts: {e}")
+                    return False
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                self.logger.warning(f"Email send attempt {attempt} failed: {e}. Retrying in {delay:.1f}s.")
+                time.sleep(delay)
+            finally:
+                if self.on_send:
+                    self.on_send(time.perf_counter() - start)
+
+    def join(self):
+        """Block until every queued message has been delivered or given up on."""
+        self._queue.join()
+
+    def shutdown(self, timeout=5.0):
+        """Stop the workers after they drain what is already queued."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(self._STOP)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
@@ -1,63 +1,285 @@
 # main.py
 import os
-from flask import Flask, request, jsonify, url_for, send_from_directory
+import atexit
+import base64
+import csv
+import hashlib
+import hmac
+import io
+import math
+import mimetypes
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from zlib import adler32
+import click
+from flask import Flask, Blueprint, current_app, request, jsonify, url_for, send_from_directory, abort, redirect, stream_with_context
+from flask.cli import AppGroup, with_appcontext
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import IntegrityError, DataError
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import safe_join
+from werkzeug.utils import import_string
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
-import resend  # Add this import at the top
+from mailer import EmailDispatcher, InMemoryEmailProvider, ResendEmailProvider
+from images import image_processing_available, process_image
+from storage import LocalStorage, S3Storage
+from json_provider import OrjsonJSONProvider, orjson_available
+from db_pool import build_engine_options, install_pool_listeners, pool_stats
+from metrics import init_request_metrics, metrics, timed
+from rate_limit import init_rate_limiting
+import passwords
+from snapshot import SnapshotPublisher, create_snapshot_target
+from upload_cache import UploadMemoryCache
+from submission_buffer import SubmissionBuffer
+from spam_filter import SpamBatchWriter, SpamFilter, create_dedup_backend
+import migrations
+import retention
+import search
 
 # --- JWT IMPORT ---
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, get_jwt_identity, decode_token, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from auth_tokens import CachingJWTManager, VerifiedTokenCache, create_token_blocklist
 
 load_dotenv('.env.local')
 
 # --- General Configuration ---
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')
+# Outside static/ (which Flask serves as well), on the same filesystem as UPLOAD_FOLDER.
+UPLOAD_SCRATCH_FOLDER = os.path.join(BASE_DIR, '.upload-tmp')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Uploads are stored as '<sha256 prefix>.<ext>' (processed variants as '<prefix>_<width>w.webp').
+CONTENT_HASH_LENGTH = 32
+CONTENT_HASHED_NAME = re.compile(rf'^([0-9a-f]{{{CONTENT_HASH_LENGTH}}})(_[0-9]+w)?\.[a-z]+$')
 
-app = Flask(__name__)
+# --- App Configuration ---
+def load_config(app):
+    """Reads the app configuration from the environment."""
+    app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'your_very_strong_and_unique_secret_key_here_CHANGE_ME')
+    app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']
+    # Access tokens are short-lived; the dashboard renews them with the refresh token
+    # (POST /api/admin/refresh) instead of logging in again.
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 15)))
+    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS', 7)))
+    # Verified tokens remembered per worker (0 disables the cache). Revoked token ids are kept
+    # in-process in front of JWT_BLOCKLIST_BACKEND: 'database' (the revoked_tokens table) or
+    # 'redis' share them between workers, 'memory' keeps them per worker only. A token the
+    # shared backend reported as not revoked is trusted for JWT_BLOCKLIST_CACHE_SECONDS, which
+    # bounds how long a logout in one worker takes to reach the others.
+    app.config['JWT_VERIFY_CACHE_SIZE'] = int(os.environ.get('JWT_VERIFY_CACHE_SIZE', 256))
+    app.config['JWT_BLOCKLIST_BACKEND'] = os.environ.get('JWT_BLOCKLIST_BACKEND', 'database')
+    app.config['JWT_BLOCKLIST_CACHE_SECONDS'] = float(os.environ.get('JWT_BLOCKLIST_CACHE_SECONDS', 10))
+    app.config['JWT_BLOCKLIST_REDIS_URL'] = os.environ.get('JWT_BLOCKLIST_REDIS_URL', 'redis://localhost:6379/0')
 
-# Updated CORS configuration
-allowed_origins = os.environ.get(
-    'ALLOWED_ORIGINS',
-    'http://localhost:5173,https://www.joelezzahid.com'
-).split(',')
+    # Password Hashing Config (see passwords.py). Stored hashes made with other parameters are
+    # upgraded on the next successful login; `flask password calibrate` suggests a value.
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
 
-CORS(
-    app,
-    resources={r"/api/*": {"origins": allowed_origins}},
-    allow_headers=["Authorization", "Content-Type"],
-    methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    supports_credentials=True
-)
+    # PostgreSQL Config (DATABASE_URL overrides it, e.g. with a local database)
+    postgres_password = os.environ.get('POSTGRES_PASSWORD')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or (
+        f"postgresql+psycopg2://avnadmin:{postgres_password}"
+        "@pg-266c3d3b-joel-1ee4.i.aivencloud.com:19622/defaultdb"
+        "?sslmode=require"
+    )
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# --- App Configuration ---
-app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET_KEY', 'your_very_strong_and_unique_secret_key_here_CHANGE_ME')
-app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=1)
-
-# PostgreSQL Config
-postgres_password = os.environ.get('POSTGRES_PASSWORD')
-app.config['SQLALCHEMY_DATABASE_URI'] = (
-    f"postgresql+psycopg2://avnadmin:{postgres_password}"
-    "@pg-266c3d3b-joel-1ee4.i.aivencloud.com:19622/defaultdb"
-    "?sslmode=require"
-)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # Connection Pool Config. Connections to the remote database are kept warm, pre-pinged
+    # and recycled; DB_STATEMENT_TIMEOUT_MS bounds every query (0 disables it). Set
+    # DB_PGBOUNCER when connecting through PgBouncer in transaction pooling mode.
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1').lower() in ['true', '1', 't']
+    app.config['DB_CONNECT_TIMEOUT'] = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))
+    app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 15000))
+    app.config['DB_PGBOUNCER'] = os.environ.get('DB_PGBOUNCER', '0').lower() in ['true', '1', 't']
+
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # Partial uploads and image processing output; must be on UPLOAD_FOLDER's filesystem for
+    # atomic renames and not publicly served. Empty uses a hidden sibling of UPLOAD_FOLDER.
+    app.config['UPLOAD_SCRATCH_FOLDER'] = os.environ.get('UPLOAD_SCRATCH_FOLDER', UPLOAD_SCRATCH_FOLDER)
+    # Seconds a cached public project feed is trusted before it is rebuilt. Admin writes
+    # invalidate the cache of the worker that handled them immediately; the TTL bounds
+    # how long other gunicorn workers can keep serving the previous feed.
+    app.config['PROJECT_FEED_CACHE_TTL'] = int(os.environ.get('PROJECT_FEED_CACHE_TTL', 60))
+    app.config['PROJECTS_MAX_PAGE_SIZE'] = int(os.environ.get('PROJECTS_MAX_PAGE_SIZE', 100))
+    # Largest per_page of the admin submission listing, and rows per round trip of its streamed export.
+    app.config['CONTACT_SUBMISSIONS_MAX_PAGE_SIZE'] = int(os.environ.get('CONTACT_SUBMISSIONS_MAX_PAGE_SIZE', 100))
+    app.config['CONTACT_SUBMISSIONS_EXPORT_BATCH_SIZE'] = int(os.environ.get('CONTACT_SUBMISSIONS_EXPORT_BATCH_SIZE', 1000))
+    # Most items (creates + updates + deletes) one admin batch request may hold.
+    app.config['ADMIN_BATCH_MAX_ITEMS'] = int(os.environ.get('ADMIN_BATCH_MAX_ITEMS', 1000))
+
+    # Email Dispatch Config ('resend' delivers for real, 'memory' keeps messages in-process for local runs)
+    app.config['EMAIL_PROVIDER'] = os.environ.get('EMAIL_PROVIDER', 'resend')
+    app.config['EMAIL_QUEUE_SIZE'] = int(os.environ.get('EMAIL_QUEUE_SIZE', 100))
+    app.config['EMAIL_WORKERS'] = int(os.environ.get('EMAIL_WORKERS', 2))
+    app.config['EMAIL_MAX_ATTEMPTS'] = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 4))
+    app.config['EMAIL_RETRY_BACKOFF'] = float(os.environ.get('EMAIL_RETRY_BACKOFF', 2.0))
+
+    # Contact Submission Write Buffer (empty path = store each submission during its request).
+    # Submissions go to a local SQLite file and are inserted in batches every FLUSH_SECONDS or
+    # once BATCH_SIZE are waiting; the notification email is sent when a submission is stored.
+    app.config['CONTACT_SUBMISSION_BUFFER_PATH'] = os.environ.get('CONTACT_SUBMISSION_BUFFER_PATH', '')
+    app.config['CONTACT_SUBMISSION_BUFFER_FLUSH_SECONDS'] = float(os.environ.get('CONTACT_SUBMISSION_BUFFER_FLUSH_SECONDS', 1.0))
+    app.config['CONTACT_SUBMISSION_BUFFER_BATCH_SIZE'] = int(os.environ.get('CONTACT_SUBMISSION_BUFFER_BATCH_SIZE', 200))
+    app.config['CONTACT_SUBMISSION_BUFFER_LEASE_SECONDS'] = int(os.environ.get('CONTACT_SUBMISSION_BUFFER_LEASE_SECONDS', 60))
+
+    # Contact Submission Retention (`flask submissions retention`, run daily from cron). Months
+    # older than RETENTION_MONTHS (0 keeps everything) are archived as gzipped NDJSON ('local'
+    # into ARCHIVE_DIR, 's3' into S3_BUCKET under ARCHIVE_S3_PREFIX) and then dropped; on Postgres
+    # it also creates the monthly partitions of the next PARTITIONS_AHEAD months.
+    app.config['CONTACT_SUBMISSION_RETENTION_MONTHS'] = int(os.environ.get('CONTACT_SUBMISSION_RETENTION_MONTHS', 0))
+    app.config['CONTACT_SUBMISSION_ARCHIVE_BACKEND'] = os.environ.get('CONTACT_SUBMISSION_ARCHIVE_BACKEND', 'local')
+    app.config['CONTACT_SUBMISSION_ARCHIVE_DIR'] = os.environ.get('CONTACT_SUBMISSION_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+    app.config['CONTACT_SUBMISSION_ARCHIVE_S3_PREFIX'] = os.environ.get('CONTACT_SUBMISSION_ARCHIVE_S3_PREFIX', 'archive/contact-submissions')
+    app.config['CONTACT_SUBMISSION_PARTITIONS_AHEAD'] = int(os.environ.get('CONTACT_SUBMISSION_PARTITIONS_AHEAD', 3))
+
+    # Image Processing Config (uploads are re-encoded to WebP in the background; needs Pillow)
+    app.config['IMAGE_PROCESSING'] = os.environ.get('IMAGE_PROCESSING', '1').lower() in ['true', '1', 't']
+    app.config['IMAGE_VARIANT_WIDTHS'] = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')]
+    app.config['IMAGE_MAX_DIMENSION'] = int(os.environ.get('IMAGE_MAX_DIMENSION', 1920))
+    app.config['IMAGE_WEBP_QUALITY'] = int(os.environ.get('IMAGE_WEBP_QUALITY', 80))
+    app.config['IMAGE_WORKERS'] = int(os.environ.get('IMAGE_WORKERS', 2))
+
+    # Upload Serving Config. Upload filenames are never reused, so they are cached as immutable.
+    # UPLOADS_SENDFILE_MODE: '' streams from Python, 'x-accel' hands the file to nginx via
+    # X-Accel-Redirect (internal location UPLOADS_ACCEL_PREFIX), 'x-sendfile' sets X-Sendfile.
+    app.config['UPLOADS_MAX_AGE'] = int(os.environ.get('UPLOADS_MAX_AGE', 31536000))
+    app.config['UPLOADS_SENDFILE_MODE'] = os.environ.get('UPLOADS_SENDFILE_MODE', '').lower()
+    app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('UPLOADS_ACCEL_PREFIX', '/protected-uploads')
+    app.config['USE_X_SENDFILE'] = app.config['UPLOADS_SENDFILE_MODE'] == 'x-sendfile'
+    # Hot uploads kept in memory per worker when streaming from Python (0 disables it): a file
+    # is cached from its UPLOADS_MEMORY_CACHE_ADMIT_AFTER-th request if it is at most
+    # UPLOADS_MEMORY_CACHE_MAX_FILE_BYTES; everything else is sent from disk with sendfile.
+    app.config['UPLOADS_MEMORY_CACHE_BYTES'] = int(os.environ.get('UPLOADS_MEMORY_CACHE_BYTES', 0))
+    app.config['UPLOADS_MEMORY_CACHE_MAX_FILE_BYTES'] = int(os.environ.get('UPLOADS_MEMORY_CACHE_MAX_FILE_BYTES', 2 * 1024 * 1024))
+    app.config['UPLOADS_MEMORY_CACHE_ADMIT_AFTER'] = int(os.environ.get('UPLOADS_MEMORY_CACHE_ADMIT_AFTER', 2))
+
+    # Image Storage Config ('local' keeps files in UPLOAD_FOLDER, 's3' uses an S3-compatible bucket)
+    app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'local')
+    app.config['S3_BUCKET'] = os.environ.get('S3_BUCKET')
+    app.config['S3_PREFIX'] = os.environ.get('S3_PREFIX', 'uploads')
+    app.config['S3_ENDPOINT_URL'] = os.environ.get('S3_ENDPOINT_URL')  # e.g. a MinIO server
+    app.config['S3_REGION'] = os.environ.get('S3_REGION')
+    app.config['S3_PRESIGN_EXPIRES'] = int(os.environ.get('S3_PRESIGN_EXPIRES', 3600))
+    # CDN or public bucket URL; without it image URLs are presigned per request
+    app.config['STORAGE_PUBLIC_BASE_URL'] = os.environ.get('STORAGE_PUBLIC_BASE_URL')
+
+    # Static Snapshot Config. With SNAPSHOT_BACKEND set ('local' writes into SNAPSHOT_DIR, 's3' into
+    # SNAPSHOT_S3_BUCKET, default S3_BUCKET, under SNAPSHOT_S3_PREFIX) the public project list is
+    # republished as versioned static JSON after every project change, for the frontend to load
+    # from static hosting or a CDN. SNAPSHOT_IMAGE_URL_BASE is the public URL of this API, used
+    # for images served by the /uploads route.
+    app.config['SNAPSHOT_BACKEND'] = os.environ.get('SNAPSHOT_BACKEND', '')
+    app.config['SNAPSHOT_DIR'] = os.environ.get('SNAPSHOT_DIR', os.path.join(BASE_DIR, 'static', 'snapshot'))
+    app.config['SNAPSHOT_S3_BUCKET'] = os.environ.get('SNAPSHOT_S3_BUCKET')
+    app.config['SNAPSHOT_S3_PREFIX'] = os.environ.get('SNAPSHOT_S3_PREFIX', 'snapshot')
+    app.config['SNAPSHOT_IMAGE_URL_BASE'] = os.environ.get('SNAPSHOT_IMAGE_URL_BASE')
+    app.config['SNAPSHOT_MANIFEST_MAX_AGE'] = int(os.environ.get('SNAPSHOT_MANIFEST_MAX_AGE', 60))
+    app.config['SNAPSHOT_KEEP_VERSIONS'] = int(os.environ.get('SNAPSHOT_KEEP_VERSIONS', 5))
+
+    # Metrics Config. Requests slower than SLOW_REQUEST_MS are logged; PROFILE_SAMPLE_RATE
+    # (0.0-1.0) runs that share of requests under cProfile and logs the slow ones'
+    # profiles, or writes them to PROFILE_DIR when set.
+    app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+    app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
+    # Static bearer token for scraping /metrics (Prometheus' authorization credentials), since
+    # admin access tokens expire within minutes. An admin access token is accepted as well.
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+
+    # Rate Limiting Config. Token buckets per client IP and endpoint, written "<burst>/<seconds>":
+    # up to <burst> requests at once, refilled completely over <seconds>; empty turns a limit off.
+    # 'memory' keeps the buckets per worker process, 'redis' shares them through
+    # RATE_LIMIT_REDIS_URL and 'fakeredis' is an in-process Redis for local runs.
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1').lower() in ['true', '1', 't']
+    app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_REDIS_URL'] = os.environ.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+    app.config['RATE_LIMIT_FORM_SUBMIT'] = os.environ.get('RATE_LIMIT_FORM_SUBMIT', '5/600')
+    app.config['RATE_LIMIT_ADMIN_AUTH'] = os.environ.get('RATE_LIMIT_ADMIN_AUTH', '10/300')
+
+    # Contact Form Screening (spam_filter.py). Repeats of the same email + message within
+    # SPAM_DEDUP_SECONDS are dropped ('memory' remembers them per worker, 'redis' across
+    # workers). Submissions scoring SPAM_SCORE_THRESHOLD or more (honeypot, timing token,
+    # SPAM_SCORERS hooks as comma-separated 'module:function') are stored as spam in batches
+    # of SPAM_BATCH_SIZE every SPAM_FLUSH_SECONDS, without a notification email. Timing tokens
+    # are single-use (remembered in the dedup backend) and valid for SPAM_TOKEN_MAX_AGE seconds.
+    app.config['SPAM_FILTER_ENABLED'] = os.environ.get('SPAM_FILTER_ENABLED', '1').lower() in ['true', '1', 't']
+    app.config['SPAM_SCORE_THRESHOLD'] = float(os.environ.get('SPAM_SCORE_THRESHOLD', 1.0))
+    app.config['SPAM_DEDUP_SECONDS'] = int(os.environ.get('SPAM_DEDUP_SECONDS', 600))
+    app.config['SPAM_DEDUP_BACKEND'] = os.environ.get('SPAM_DEDUP_BACKEND', 'memory')
+    app.config['SPAM_DEDUP_REDIS_URL'] = os.environ.get('SPAM_DEDUP_REDIS_URL', app.config['RATE_LIMIT_REDIS_URL'])
+    app.config['SPAM_MIN_FILL_SECONDS'] = float(os.environ.get('SPAM_MIN_FILL_SECONDS', 3.0))
+    app.config['SPAM_TOKEN_MAX_AGE'] = int(os.environ.get('SPAM_TOKEN_MAX_AGE', 3600))
+    app.config['SPAM_SCORERS'] = os.environ.get('SPAM_SCORERS', '')
+    app.config['SPAM_BATCH_SIZE'] = int(os.environ.get('SPAM_BATCH_SIZE', 200))
+    app.config['SPAM_FLUSH_SECONDS'] = float(os.environ.get('SPAM_FLUSH_SECONDS', 5.0))
+    # Number of proxies in front of the app that append to X-Forwarded-For (1 on Render and
+    # most PaaS load balancers), so rate limits see client IPs rather than the proxy's: with 0
+    # behind a proxy every visitor shares one bucket. Set 0 only when clients connect directly,
+    # as a trusted hop lets them choose their X-Forwarded-For. Applies under asgi.py too.
+    app.config['PROXY_FIX_X_FOR'] = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+
+    # JSON Encoding Config ('orjson' when installed, 'default' for Flask's standard library encoder)
+    app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'orjson')
+
+    # Async Serving Config (asgi.py). ASYNC_DATABASE_URL defaults to SQLALCHEMY_DATABASE_URI
+    # with its async driver; ASGI_SYNC_WORKERS threads run the routes that stay synchronous.
+    app.config['ASYNC_DATABASE_URL'] = os.environ.get('ASYNC_DATABASE_URL')
+    app.config['ASGI_SYNC_WORKERS'] = int(os.environ.get('ASGI_SYNC_WORKERS', 10))
 
 # --- Initialize Extensions ---
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
+# Bound to an app in create_app(); nothing here opens a database connection.
+db = SQLAlchemy()
+jwt = CachingJWTManager()
+cors = CORS()
+api = Blueprint('api', __name__)
+
+def create_image_storage(config):
+    backend = config['STORAGE_BACKEND']
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'], scratch_dir=config['UPLOAD_SCRATCH_FOLDER'] or None)
+    if backend == 's3':
+        return S3Storage(
+            config['S3_BUCKET'],
+            prefix=config['S3_PREFIX'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            region=config['S3_REGION'],
+            public_base_url=config['STORAGE_PUBLIC_BASE_URL'],
+            presign_expires=config['S3_PRESIGN_EXPIRES'],
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'")
 
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-    print(f"Created upload folder at: {UPLOAD_FOLDER}")
+def get_image_storage():
+    return current_app.extensions['image_storage']
+
+def get_uploads_memory_cache():
+    return current_app.extensions.get('uploads_memory_cache')
+
+def get_project_feed_cache():
+    return current_app.extensions['project_feed_cache']
+
+def get_submission_buffer():
+    return current_app.extensions.get('submission_buffer')
+
+def get_spam_filter():
+    return current_app.extensions.get('spam_filter')
+
+def get_email_dispatcher():
+    return current_app.extensions['email_dispatcher']
 
 # --- Database Models ---
 class AdminUser(db.Model):
@@ -67,14 +289,29 @@ class AdminUser(db.Model):
     password_hash = db.Column(db.String(256), nullable=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        with timed('password_hash'):
+            self.password_hash = passwords.hash_password(password, current_app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        with timed('password_check'):
+            return passwords.verify_password(self.password_hash, password)
+
+    def rehash_password_if_outdated(self, password):
+        """After a successful check: re-hashes with PASSWORD_HASH_METHOD if the stored hash uses other parameters."""
+        if not passwords.needs_rehash(self.password_hash, current_app.config['PASSWORD_HASH_METHOD']):
+            return False
+        self.set_password(password)
+        return True
 
     def __repr__(self):
         return f'<AdminUser {self.username}>'
 
+class RevokedToken(db.Model):
+    """Token ids revoked before they expire (logout, refresh token rotation); see auth_tokens.py."""
+    __tablename__ = 'revoked_tokens'
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
 class Project(db.Model):
     __tablename__ = 'projects'
     id = db.Column(db.Integer, primary_key=True)
@@ -82,27 +319,31 @@ class Project(db.Model):
     description = db.Column(db.Text, nullable=True)
     project_url = db.Column(db.String(255), nullable=True)
     image_filename = db.Column(db.String(100), nullable=True)
-    date_added = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    image_variants = db.Column(db.JSON, nullable=True)  # {"<width>": "<filename>"}, filled in by process_project_image
+    date_added = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    # Backs the keyset pagination of project listings (newest first, id as tie-breaker).
+    __table_args__ = (
+        db.Index('ix_projects_date_added_id', 'date_added', 'id'),
+    )
 
     def __repr__(self):
         return f'<Project {self.name}>'
 
-    def to_dict(self, include_image_url_base=None):
-        image_full_url = None
-        if self.image_filename:
-            if include_image_url_base:
-                image_full_url = f"{include_image_url_base.rstrip('/')}{url_for('uploaded_file', filename=self.image_filename)}"
-            else:
-                image_full_url = url_for('uploaded_file', filename=self.image_filename, _external=False)
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'project_url': self.project_url,
-            'image_filename': self.image_filename,
-            'image_url': image_full_url,
-            'date_added': self.date_added.isoformat() if self.date_added else None
-        }
+    def to_dict(self, include_image_url_base=None, fields=None):
+        return project_serializer(include_image_url_base, fields)(self)
+
+# Fields a project listing can be projected to with ?fields=, and the columns each one needs.
+PROJECT_FIELD_COLUMNS = {
+    'id': [Project.id],
+    'name': [Project.name],
+    'description': [Project.description],
+    'project_url': [Project.project_url],
+    'image_filename': [Project.image_filename],
+    'image_url': [Project.image_filename],
+    'srcset': [Project.image_variants],
+    'date_added': [Project.date_added],
+}
 
 class ContactSubmission(db.Model):
     __tablename__ = 'contact_submissions'
@@ -112,78 +353,916 @@ class ContactSubmission(db.Model):
     phone = db.Column(db.String(50), nullable=True)
     message = db.Column(db.Text, nullable=False)
     submission_date = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Set on rows stored from the write buffer, so a batch retried after a crash skips them.
+    buffer_id = db.Column(db.String(36), nullable=True)
+    # Flagged by the spam filter: stored without a notification email, with the checks that flagged it.
+    is_spam = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    spam_reasons = db.Column(db.String(255), nullable=True)
+
+    # Backs the keyset pagination and export of submissions (newest first, id as tie-breaker).
+    __table_args__ = (
+        db.Index('ix_contact_submissions_submission_date_id', 'submission_date', 'id'),
+        db.Index('ix_contact_submissions_buffer_id', 'buffer_id'),
+    )
 
     def __repr__(self):
         return f'<ContactSubmission {self.name} - {self.email}>'
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'phone': self.phone,
-            'message': self.message,
-            'submission_date': self.submission_date.isoformat() if self.submission_date else None
-        }
+        return serialize_contact_submission(self)
+
+# --- Serialization ---
+# Listings select plain column tuples and serialize them with these functions, so no ORM
+# objects are hydrated; to_dict() runs the same code on a model instance.
+def project_image_url_builder(include_image_url_base=None):
+    """filename -> image URL. App-served URLs share one prefix, built here once instead of per image."""
+    storage = get_image_storage()
+    prefix = url_for('api.uploaded_file', filename='_')[:-1]
+    if include_image_url_base:
+        prefix = include_image_url_base.rstrip('/') + prefix
+    if not storage.direct_urls:
+        return lambda filename: prefix + filename
+    return lambda filename: storage.url(filename) or prefix + filename
+
+def project_serializer(include_image_url_base=None, fields=None):
+    """
+    row -> dict for projects, where row is a Project or a result row with the columns
+    for fields (see project_listing_columns). Only the requested attributes are read,
+    so columns that were never loaded are not lazy-loaded (which asyncio can't do).
+    """
+    image_url = project_image_url_builder(include_image_url_base)
+
+    def srcset(variants):
+        return ', '.join(
+            f"{image_url(filename)} {width}w"
+            for width, filename in sorted(variants.items(), key=lambda item: int(item[0]))
+        )
+
+    converters = {
+        'id': lambda row: row.id,
+        'name': lambda row: row.name,
+        'description': lambda row: row.description,
+        'project_url': lambda row: row.project_url,
+        'image_filename': lambda row: row.image_filename,
+        'image_url': lambda row: image_url(row.image_filename) if row.image_filename else None,
+        'srcset': lambda row: srcset(row.image_variants) if row.image_variants else None,
+        'date_added': lambda row: row.date_added.isoformat() if row.date_added else None,
+    }
+    selected = [(key, convert) for key, convert in converters.items() if fields is None or key in fields]
+    return lambda row: {key: convert(row) for key, convert in selected}
+
+def serialize_contact_submission(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'phone': row.phone,
+        'message': row.message,
+        'submission_date': row.submission_date.isoformat() if row.submission_date else None,
+        'is_spam': bool(row.is_spam),
+        'spam_reasons': row.spam_reasons,
+    }
 
 # --- Helper Functions ---
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def save_image(file_storage):
+    """
+    Streams the upload to a temp file while hashing it, then stores it in the image storage
+    named after its content, so the same image uploaded twice is stored once.
+    Returns the stored filename.
+    """
     if file_storage and file_storage.filename and allowed_file(file_storage.filename):
-        filename = secure_filename(file_storage.filename)
-        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')
-        name, ext = os.path.splitext(filename)
-        unique_filename = f"{name}_{timestamp}{ext}"
+        ext = file_storage.filename.rsplit('.', 1)[1].lower()
+        storage = get_image_storage()
+        digest = hashlib.sha256()
+        tmp_path = None
         try:
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file_storage.save(file_path)
+            with tempfile.NamedTemporaryFile(dir=storage.scratch_dir, suffix='.part', delete=False) as tmp:
+                tmp_path = tmp.name
+                for chunk in iter(lambda: file_storage.stream.read(64 * 1024), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            unique_filename = f"{digest.hexdigest()[:CONTENT_HASH_LENGTH]}.{ext}"
+            if storage.exists(unique_filename):
+                os.remove(tmp_path)
+            else:
+                storage.put(tmp_path, unique_filename)
             return unique_filename
         except Exception as e:
-            app.logger.error(f"Failed to save image {unique_filename}: {e}")
+            current_app.logger.error(f"Failed to save image {file_storage.filename}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
             return None
     return None
 
+def image_file_in_use(filename):
+    """
+    Content-hashed files can be shared by several projects. An original is in use while
+    a project points at it; a processed variant while any project points at one of the
+    variants of the same content.
+    """
+    match = CONTENT_HASHED_NAME.match(filename)
+    if match and match.group(2):
+        query = Project.query.filter(Project.image_filename.startswith(f"{match.group(1)}_"))
+    else:
+        query = Project.query.filter_by(image_filename=filename)
+    return query.first() is not None
+
+def remove_image_files(*filenames):
+    uploads_memory_cache = get_uploads_memory_cache()
+    for filename in filenames:
+        if not filename or image_file_in_use(filename):
+            continue
+        if uploads_memory_cache is not None:
+            uploads_memory_cache.discard(filename)
+        try: get_image_storage().delete(filename)
+        except Exception as e: current_app.logger.warning(f"Error deleting image file {filename}: {e}")
+
+VARIANT_NAME = re.compile(r'^(.+)_[0-9]+w\.webp$')
+
+def project_image_files(project):
+    """
+    Every stored file that belongs to the project's image: the main file, its variants and,
+    for processed images, the original upload kept alongside them (any allowed extension).
+    """
+    files = {project.image_filename, *(project.image_variants or {}).values()} - {None}
+    stems = {match.group(1) for match in map(VARIANT_NAME.match, files) if match}
+    return files | {f"{stem}.{ext}" for stem in stems for ext in ALLOWED_EXTENSIONS}
+
+def schedule_image_processing(project_id, filename):
+    """Queue a freshly uploaded image for re-encoding once its project row is committed."""
+    if not filename or not current_app.config['IMAGE_PROCESSING']:
+        return
+    if not image_processing_available():
+        current_app.logger.warning("Image processing skipped: Pillow is not installed")
+        return
+    current_app.extensions['image_executor'].submit(
+        process_project_image, current_app._get_current_object(), project_id, filename
+    )
+
+def process_project_image(app, project_id, filename):
+    """
+    Runs on the image worker pool: re-encodes the original upload into stripped WebP
+    variants and points the project at them. The original is kept: cached feeds, published
+    snapshots and earlier responses still link to it, for longer than any TTL here bounds.
+    project_image_files() finds it again when the project or its image goes away.
+    """
+    with app.app_context():
+        # Keep the unique suffix of older timestamped names; variant names must fit in 100 chars.
+        stem = os.path.splitext(filename)[0][-88:]
+        storage = get_image_storage()
+        output_dir = tempfile.mkdtemp(dir=storage.scratch_dir, prefix='.processing-')
+        try:
+            with storage.local_copy(filename) as source_path:
+                result = process_image(
+                    source_path, output_dir, stem,
+                    widths=app.config['IMAGE_VARIANT_WIDTHS'],
+                    max_dimension=app.config['IMAGE_MAX_DIMENSION'],
+                    quality=app.config['IMAGE_WEBP_QUALITY'],
+                )
+            if result is None:
+                return
+            main_filename, variants = result
+            for name in variants.values():
+                storage.put(os.path.join(output_dir, name), name)
+        except Exception as e:
+            app.logger.error(f"Failed to process image {filename} for project ID {project_id}: {e}", exc_info=True)
+            return
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+        project = db.session.get(Project, project_id)
+        if not project or project.image_filename != filename:
+            # The project was deleted or given another image while we were encoding.
+            remove_image_files(*variants.values())
+            return
+        project.image_filename = main_filename
+        project.image_variants = {str(width): name for width, name in variants.items()}
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Failed to record image variants for project ID {project_id}: {e}", exc_info=True)
+            remove_image_files(*variants.values())
+            return
+        run_post_commit(publish_project_changes)
+        app.logger.info(f"Processed image for project ID {project_id} into {len(variants)} WebP variants.")
+
+class ProjectFeedCache:
+    """
+    In-process cache of the serialized public project feed. Entries carry a strong ETag
+    computed from the response body so every worker produces the same validator.
+
+    Keys come from public_projects_cache_key(): the default feed (what the site loads) is
+    kept apart from other pages and projections, each in its own small LRU, so clients
+    walking cursors or varying ?fields= can't evict it. Searches aren't cached (key None).
+    Misses are built once per key; builds of different keys run concurrently.
+    """
+
+    def __init__(self, ttl_seconds, max_feeds=8, max_pages=64):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = {'feed': max_feeds, 'page': max_pages}
+        self._entries = {kind: OrderedDict() for kind in self.max_entries}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_locks = {}  # key -> [lock, threads using it]
+
+    def _get_fresh(self, key):
+        entries = self._entries[key[0]]
+        entry = entries.get(key)
+        if entry and entry['expires_at'] > datetime.now(timezone.utc):
+            entries.move_to_end(key)
+            return entry
+        return None
+
+    def lookup(self, key):
+        """Returns (fresh entry for key or None, current generation)."""
+        with self._lock:
+            return (self._get_fresh(key) if key is not None else None), self._generation
+
+    def make_entry(self, body):
+        now = datetime.now(timezone.utc)
+        return {
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest(),
+            'last_modified': now.replace(microsecond=0),
+            'expires_at': now + timedelta(seconds=self.ttl_seconds),
+        }
+
+    def store(self, key, body, generation):
+        """
+        Wraps body in a cache entry and keeps it unless key is None or the feed was
+        invalidated since generation (an admin changed the data mid-build). Returns the
+        entry either way.
+        """
+        entry = self.make_entry(body)
+        if key is None:
+            return entry
+        with self._lock:
+            if generation == self._generation:
+                entries = self._entries[key[0]]
+                entries[key] = entry
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries[key[0]]:
+                    entries.popitem(last=False)
+        return entry
+
+    @contextmanager
+    def single_flight(self, key):
+        """Held while building key, so concurrent misses on it wait for one build."""
+        with self._lock:
+            holder = self._build_locks.setdefault(key, [threading.Lock(), 0])
+            holder[1] += 1
+        try:
+            with holder[0]:
+                yield
+        finally:
+            with self._lock:
+                holder[1] -= 1
+                if not holder[1]:
+                    del self._build_locks[key]
+
+    def get_or_build(self, key, build_body):
+        """Return the cached entry for key, calling build_body() once on a miss."""
+        entry, _ = self.lookup(key)
+        if entry:
+            return entry
+        if key is None:
+            return self.make_entry(build_body())
+        # Only one thread rebuilds each key; the rest wait and reuse its result.
+        with self.single_flight(key):
+            entry, generation = self.lookup(key)
+            if entry:
+                return entry
+            return self.store(key, build_body(), generation)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            for entries in self._entries.values():
+                entries.clear()
+
+def revoke_token(claims):
+    current_app.extensions['token_blocklist'].revoke(claims['jti'], claims.get('exp'))
+
+@jwt.token_in_blocklist_loader
+def token_in_blocklist(jwt_header, jwt_payload):
+    return current_app.extensions['token_blocklist'].is_revoked(jwt_payload['jti'], jwt_payload.get('exp'))
+
+def run_post_commit(step, *args):
+    """
+    Runs a follow-up of an already committed change (feed invalidation, image processing).
+    The change is saved whatever happens here, so a failure is logged rather than returned.
+    """
+    try:
+        step(*args)
+    except Exception as e:
+        current_app.logger.error(f"Post-commit step {step.__name__} failed: {e}", exc_info=True)
+
+def publish_project_changes():
+    """After a committed project change: drops the cached feeds and schedules a snapshot rebuild."""
+    get_project_feed_cache().invalidate()
+    snapshot_publisher = current_app.extensions.get('snapshot_publisher')
+    if snapshot_publisher:
+        snapshot_publisher.request_publish()
+
+def build_project_snapshot():
+    """The public project list as /api/projects serves it, with image URLs under SNAPSHOT_IMAGE_URL_BASE."""
+    with current_app.test_request_context('/api/projects', base_url=current_app.config['SNAPSHOT_IMAGE_URL_BASE']):
+        return project_listing_payload({'limit': None, 'cursor': None, 'fields': None, 'q': None})
+
+def encode_keyset_cursor(moment, row_id):
+    raw = f"{moment.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_keyset_cursor(cursor):
+    """Returns (datetime, id) for a cursor from encode_keyset_cursor, or None if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date_part, id_part = raw.rsplit('|', 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def encode_project_cursor(project):
+    return encode_keyset_cursor(project.date_added, project.id)
+
+def parse_search_query(args, errors):
+    """The ?q= full-text query of a listing, or None. Problems are added to errors."""
+    q = (args.get('q') or '').strip()
+    if not q:
+        return None
+    if len(q) > search.MAX_QUERY_LENGTH:
+        errors['q'] = f"q must be at most {search.MAX_QUERY_LENGTH} characters."
+    elif not re.search(r'\w', q):
+        errors['q'] = "q must contain at least one word."
+    elif not search.search_supported(db.engine.dialect.name):
+        errors['q'] = "Search is not available on this database."
+    return q
+
+def parse_project_listing_args(args):
+    """
+    Reads limit/cursor/fields/q from the query string of a project listing.
+    Returns (options, errors); options is None when errors is non-empty.
+    """
+    errors = {}
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            errors['limit'] = "limit must be a positive integer."
+        else:
+            limit = min(limit, current_app.config['PROJECTS_MAX_PAGE_SIZE'])
+
+    cursor = args.get('cursor')
+    if cursor:
+        cursor = decode_keyset_cursor(cursor)
+        if cursor is None:
+            errors['cursor'] = "Invalid cursor."
+
+    fields = args.get('fields')
+    if fields:
+        fields = frozenset(f.strip() for f in fields.split(',') if f.strip())
+        unknown = fields - PROJECT_FIELD_COLUMNS.keys()
+        if unknown:
+            errors['fields'] = f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(PROJECT_FIELD_COLUMNS)}."
+    else:
+        fields = None
+
+    q = parse_search_query(args, errors)
+    if q and cursor:
+        errors['cursor'] = "Search results are ranked and can't be paged with a cursor."
+
+    if errors:
+        return None, errors
+    return {'limit': limit, 'cursor': cursor or None, 'fields': fields, 'q': q}, {}
+
+def project_listing_columns(fields=None):
+    """Columns a listing with these fields needs; id and date_added are always there for the cursor."""
+    columns = {'id': Project.id, 'date_added': Project.date_added}
+    for field in (PROJECT_FIELD_COLUMNS if fields is None else fields):
+        for column in PROJECT_FIELD_COLUMNS[field]:
+            columns.setdefault(column.key, column)
+    return list(columns.values())
+
+def project_listing_statement(limit=None, cursor=None, fields=None, q=None, dialect=None):
+    """
+    SELECT of the listing columns (rows, not Project objects) for a newest-first project
+    listing using keyset pagination over (date_added, id), so deep pages cost the same as
+    the first one. Paginated statements fetch one extra row to tell whether there is a
+    next page (see paginate_projects). With q it is instead the best matches for q, up to
+    limit (or PROJECTS_MAX_PAGE_SIZE), with `snippet` added to the rows.
+    """
+    if q:
+        return search.search_statement(
+            dialect, Project.__table__, q, project_listing_columns(fields),
+            limit or current_app.config['PROJECTS_MAX_PAGE_SIZE'],
+        )
+    statement = db.select(*project_listing_columns(fields)).order_by(Project.date_added.desc(), Project.id.desc())
+    if cursor:
+        cursor_date, cursor_id = cursor
+        statement = statement.where(or_(
+            Project.date_added < cursor_date,
+            and_(Project.date_added == cursor_date, Project.id < cursor_id)
+        ))
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+    return statement
+
+def paginate_projects(rows, limit):
+    """Trims the rows of project_listing_statement to a page. Returns (rows, next_cursor)."""
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_project_cursor(rows[-1])
+    return rows, None
+
+def list_projects(limit=None, cursor=None, fields=None, q=None):
+    statement = project_listing_statement(limit, cursor, fields, q, dialect=db.engine.dialect.name)
+    return paginate_projects(db.session.execute(statement).all(), limit)
+
+def serialize_project_listing(rows, next_cursor, options):
+    """
+    Without limit/cursor the response stays a plain array; paginated requests get
+    {"projects": [...], "next_cursor": ...} and searches {"query": ..., "projects": [...]}
+    with a highlighted `snippet` on each project.
+    """
+    with timed('project_serialization'):
+        serialize = project_serializer(request.host_url, options['fields'])
+        items = [serialize(row) for row in rows]
+        if options['q']:
+            for item, row in zip(items, rows):
+                item['snippet'] = search.render_snippet(row.snippet)
+    if options['q']:
+        return {'query': options['q'], 'projects': items}
+    if options['limit'] is None and options['cursor'] is None:
+        return items
+    return {'projects': items, 'next_cursor': next_cursor}
+
+def project_listing_payload(options):
+    return serialize_project_listing(*list_projects(**options), options)
+
+def public_projects_cache_key(options):
+    """
+    ProjectFeedCache key for a public listing, or None for searches, whose key space
+    is whatever visitors type. Image URLs in the feed are absolute, so the host is part of the key.
+    """
+    if options['q']:
+        return None
+    if options['limit'] is None and options['cursor'] is None and options['fields'] is None:
+        return ('feed', request.host_url)
+    return ('page', request.host_url, options['limit'], options['cursor'], options['fields'])
+
+def project_feed_response(feed):
+    response = current_app.response_class(feed['body'], mimetype='application/json')
+    response.set_etag(feed['etag'])
+    response.last_modified = feed['last_modified']
+    # Let browsers keep the feed but revalidate it on every load (304 when unchanged).
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def contact_form_errors(data):
+    """Validation errors for a contact form payload ({} when it is valid)."""
+    errors = {}
+    if not data.get('name'): errors['name'] = "Name is required."
+    if not data.get('email'): errors['email'] = "Email is required."
+    if not data.get('message'): errors['message'] = "Message is required."
+    # Basic email format check
+    if data.get('email') and '@' not in data['email']: errors['email_format'] = "Invalid email format."
+    return errors
+
+# ?count= modes of the admin submission listing's `total`
+CONTACT_SUBMISSION_COUNT_MODES = ('estimate', 'exact', 'none')
+# Planner row estimate kept current by autovacuum/ANALYZE, summed over the monthly partitions
+# (the partitioned parent has no estimate of its own); an exact count while none was analyzed.
+ESTIMATED_CONTACT_SUBMISSION_COUNT = db.text(
+    "SELECT CASE WHEN sum(greatest(reltuples, 0)) > 0 THEN sum(greatest(reltuples, 0))::bigint "
+    "ELSE (SELECT count(*) FROM contact_submissions) END "
+    "FROM pg_class WHERE relkind = 'r' AND (oid = 'contact_submissions'::regclass "
+    "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'contact_submissions'::regclass))"
+)
+
+def contact_submissions_page_statement(options, dialect=None):
+    """
+    One page of the admin submission listing, newest first, as rows for
+    serialize_contact_submission. Pages follow a keyset cursor over (submission_date, id),
+    so deep pages cost the same as the first one; page= still pages with OFFSET for older
+    clients. Fetches one extra row to tell whether there is a next page. With q the page
+    is of the best matches for q instead, with `snippet` added to the rows.
+    """
+    per_page, page = options['per_page'], options['page']
+    table = ContactSubmission.__table__
+    if options['q']:
+        return search.search_statement(
+            dialect, table, options['q'], list(table.columns), per_page + 1, ((page or 1) - 1) * per_page
+        )
+    statement = db.select(*table.columns).order_by(
+        ContactSubmission.submission_date.desc(), ContactSubmission.id.desc()
+    )
+    if options['cursor']:
+        cursor_date, cursor_id = options['cursor']
+        statement = statement.where(or_(
+            ContactSubmission.submission_date < cursor_date,
+            and_(ContactSubmission.submission_date == cursor_date, ContactSubmission.id < cursor_id)
+        ))
+    if page:
+        statement = statement.offset((page - 1) * per_page)
+    return statement.limit(per_page + 1)
+
+def contact_submissions_count_statement(options, dialect=None):
+    """
+    (statement, estimated) for the listing's `total`; the statement is None with
+    count=none. count=estimate (the default) reads the planner's row estimate on Postgres
+    rather than scanning the table; searches and other databases are counted exactly.
+    """
+    if options['count'] == 'none':
+        return None, False
+    if options['q']:
+        return search.search_count_statement(dialect, ContactSubmission.__table__, options['q']), False
+    if options['count'] == 'estimate' and dialect == 'postgresql':
+        return ESTIMATED_CONTACT_SUBMISSION_COUNT, True
+    return db.select(db.func.count()).select_from(ContactSubmission), False
+
+def parse_contact_submission_listing_args(args):
+    """
+    per_page/cursor/page/count/q for the admin submission listing. per_page is capped at
+    CONTACT_SUBMISSIONS_MAX_PAGE_SIZE; invalid page numbers and sizes fall back to the
+    defaults. Returns (options, errors) like parse_project_listing_args.
+    """
+    errors = {}
+    per_page = args.get('per_page', 20, type=int)
+    per_page = min(per_page if per_page >= 1 else 20, current_app.config['CONTACT_SUBMISSIONS_MAX_PAGE_SIZE'])
+    page = args.get('page', type=int)
+    if page is not None and page < 1:
+        page = 1
+
+    cursor = args.get('cursor')
+    if cursor:
+        cursor = decode_keyset_cursor(cursor)
+        if cursor is None:
+            errors['cursor'] = "Invalid cursor."
+        elif page:
+            errors['cursor'] = "Use either cursor or page, not both."
+
+    count = args.get('count', 'estimate')
+    if count not in CONTACT_SUBMISSION_COUNT_MODES:
+        errors['count'] = f"count must be one of: {', '.join(CONTACT_SUBMISSION_COUNT_MODES)}."
+
+    q = parse_search_query(args, errors)
+    if q and cursor:
+        errors['cursor'] = "Search results are ranked and can't be paged with a cursor."
+
+    if errors:
+        return None, errors
+    return {'per_page': per_page, 'page': page, 'cursor': cursor or None, 'count': count, 'q': q}, {}
+
+def contact_submission_listing_payload(rows, total, options, total_estimated=False):
+    """
+    Trims the rows of contact_submissions_page_statement to the page. next_cursor is null
+    on the last page (and for searches, which page with page=); total and pages are null
+    with count=none, and current_page is null for cursor pages.
+    """
+    per_page = options['per_page']
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        if not options['q']:
+            next_cursor = encode_keyset_cursor(rows[-1].submission_date, rows[-1].id)
+    submissions = [serialize_contact_submission(row) for row in rows]
+    if options['q']:
+        for submission, row in zip(submissions, rows):
+            submission['snippet'] = search.render_snippet(row.snippet)
+    return {
+        'submissions': submissions,
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+        'total': total,
+        'total_estimated': total_estimated,
+        'pages': math.ceil(total / per_page) if total is not None else None,
+        'current_page': None if options['cursor'] else options['page'] or 1,
+    }
+
+# Formats of the streamed submission export -> mimetype
+CONTACT_SUBMISSION_EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+CONTACT_SUBMISSION_EXPORT_FIELDS = ['id', 'name', 'email', 'phone', 'message', 'submission_date', 'is_spam', 'spam_reasons']
+
+def csv_cell(value):
+    """CSV cell text; values a spreadsheet would run as a formula are prefixed with an apostrophe."""
+    if value is None:
+        return ''
+    value = str(value)
+    return "'" + value if value[:1] in ('=', '+', '-', '@', '\t', '\r') else value
+
+def export_contact_submissions(export_format, batch_size):
+    """
+    Yields every submission, oldest first, encoded as NDJSON lines or CSV (with a header
+    row), one chunk per batch of rows. Rows are read through a server-side cursor
+    (stream_results), so memory use stays the same however large the table is.
+    """
+    statement = (
+        db.select(*ContactSubmission.__table__.columns)
+        .order_by(ContactSubmission.submission_date, ContactSubmission.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CONTACT_SUBMISSION_EXPORT_FIELDS)
+        for batch in db.session.execute(statement).partitions():
+            for row in batch:
+                submission = serialize_contact_submission(row)
+                writer.writerow([csv_cell(submission[field]) for field in CONTACT_SUBMISSION_EXPORT_FIELDS])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        dumps = current_app.json.dumps
+        for batch in db.session.execute(statement).partitions():
+            yield ''.join(dumps(serialize_contact_submission(row)) + '\n' for row in batch)
+
+def chunked(items, size=500):
+    """Splits items into lists of at most size, keeping IN (...) lists under database parameter limits."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def parse_batch_request(data, operations):
+    """
+    Reads a batch body ({operation: [items]} for the given operations) from the admin
+    batch endpoints. Returns ({operation: items}, error message or None).
+    """
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object."
+    batch = {operation: data.get(operation) or [] for operation in operations}
+    if any(not isinstance(items, list) for items in batch.values()):
+        return None, f"{', '.join(operations)} must be lists."
+    if not any(batch.values()):
+        return None, f"Nothing to do: provide {', '.join(operations)}."
+    max_items = current_app.config['ADMIN_BATCH_MAX_ITEMS']
+    if sum(len(items) for items in batch.values()) > max_items:
+        return None, f"A batch can hold at most {max_items} items."
+    return batch, None
+
+def parse_batch_ids(items):
+    """The distinct integer ids of a delete list, in order; None if any item is not an id."""
+    if any(not isinstance(item, int) or isinstance(item, bool) for item in items):
+        return None
+    return list(dict.fromkeys(items))
+
+def project_payload_errors(data, partial=False):
+    """Validation errors for a JSON project in a batch; updates (partial) may leave fields out."""
+    if not isinstance(data, dict):
+        return {'item': "Each item must be an object."}
+    errors = {}
+    if not partial or 'name' in data:
+        name = data.get('name')
+        if not isinstance(name, str) or len(name.strip()) == 0:
+            errors['name'] = "Project name is required and cannot be empty."
+        elif len(name) > 100:
+            errors['name'] = "Project name must be 100 characters or less."
+    for field in ('description', 'project_url'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            errors[field] = f"{field} must be a string."
+    if isinstance(data.get('project_url'), str) and len(data['project_url']) > 255:
+        errors['project_url'] = "Project URL must be 255 characters or less."
+    return errors
+
+def project_payload_values(data):
+    """Column values of a valid batch project payload, stripped like the form endpoints do."""
+    values = {}
+    if 'name' in data:
+        values['name'] = data['name'].strip()
+    for field in ('description', 'project_url'):
+        if field in data:
+            values[field] = data[field].strip() or None if data[field] else None
+    return values
+
+def apply_project_batch(batch, delete_ids):
+    """
+    Runs a project batch (delete_ids from parse_batch_ids) in the current transaction (the caller commits):
+    creates with one multi-row INSERT ... RETURNING, updates as an executemany by primary
+    key and deletes as DELETE ... WHERE id IN (...) RETURNING the image columns.
+    Returns (results per operation, image files of the deleted projects).
+    """
+    results = {'create': [], 'update': [], 'delete': []}
+    columns = project_listing_columns()
+
+    creates = []
+    for index, data in enumerate(batch['create']):
+        errors = project_payload_errors(data)
+        if errors:
+            results['create'].append({'index': index, 'status': 422, 'errors': errors})
+        else:
+            creates.append((index, project_payload_values(data)))
+    if creates:
+        rows = db.session.execute(
+            db.insert(Project).returning(*columns, sort_by_parameter_order=True),
+            [values for _, values in creates],
+        ).all()
+        results['create'].extend({'index': index, 'status': 201, 'row': row} for (index, _), row in zip(creates, rows))
+        results['create'].sort(key=lambda result: result['index'])
+
+    update_ids = [data.get('id') for data in batch['update'] if isinstance(data, dict)]
+    existing = set()
+    for chunk in chunked([i for i in update_ids if isinstance(i, int)]):
+        existing.update(db.session.scalars(db.select(Project.id).where(Project.id.in_(chunk))))
+    updates, seen = [], set()
+    for data in batch['update']:
+        project_id = data.get('id') if isinstance(data, dict) else None
+        errors = project_payload_errors(data, partial=True)
+        if not isinstance(project_id, int) or isinstance(project_id, bool):
+            errors['id'] = "id must be a project id."
+        elif project_id in seen:
+            errors['id'] = "Project is updated more than once in this batch."
+        elif project_id in delete_ids:
+            errors['id'] = "Project is deleted in this batch."
+        if errors:
+            results['update'].append({'id': project_id, 'status': 422, 'errors': errors})
+        elif project_id not in existing:
+            results['update'].append({'id': project_id, 'status': 404, 'message': "Project not found"})
+        else:
+            seen.add(project_id)
+            updates.append({'id': project_id, **project_payload_values(data)})
+            results['update'].append({'id': project_id, 'status': 200})
+    changed = [values for values in updates if len(values) > 1]
+    if changed:
+        db.session.execute(db.update(Project), changed)
+    if updates:
+        updated_rows = {}
+        for chunk in chunked([values['id'] for values in updates]):
+            updated_rows.update((row.id, row) for row in db.session.execute(
+                db.select(*columns).where(Project.id.in_(chunk))
+            ))
+        for result in results['update']:
+            if result['status'] == 200:
+                result['row'] = updated_rows[result['id']]
+
+    image_files = set()
+    deleted = set()
+    for chunk in chunked(delete_ids):
+        for row in db.session.execute(
+            db.delete(Project).where(Project.id.in_(chunk))
+            .returning(Project.id, Project.image_filename, Project.image_variants)
+            .execution_options(synchronize_session=False)
+        ):
+            deleted.add(row.id)
+            image_files.update(project_image_files(row))
+    results['delete'] = [
+        {'id': project_id, 'status': 200} if project_id in deleted
+        else {'id': project_id, 'status': 404, 'message': "Project not found"}
+        for project_id in delete_ids
+    ]
+    return results, image_files
+
+def create_email_provider(name):
+    if name == 'memory':
+        return InMemoryEmailProvider()
+    if name == 'resend':
+        return ResendEmailProvider(os.environ.get('RESEND_API_KEY'))
+    raise ValueError(f"Unknown EMAIL_PROVIDER '{name}'")
+
+def build_notification_email(submission, notification_email):
+    return {
+        "from": "Portfolio <hello@joelezzahid.com>", 
+        "to": notification_email,
+        "subject": f"New Contact Form Submission from {submission.name}",
+        "html": f"""
+        <h2>New Contact Form Submission</h2>
+        <p><strong>Date:</strong> {submission.submission_date.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
+        <hr>
+        <p><strong>Name:</strong> {submission.name}</p>
+        <p><strong>Email:</strong> <a href="mailto:{submission.email}">{submission.email}</a></p>
+        <p><strong>Phone:</strong> {submission.phone or 'Not provided'}</p>
+        <hr>
+        <p><strong>Message:</strong></p>
+        <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
+            <pre style="white-space: pre-wrap; font-family: Arial, sans-serif;">{submission.message}</pre>
+        </div>
+        """
+    }
+
 def send_notification_email(submission):
-    """Send email notification using Resend"""
-    resend.api_key = os.environ.get('RESEND_API_KEY')
-    print("running the send notification function") #
+    """Queue a notification email for the background dispatcher. Returns True if queued."""
     notification_email = os.environ.get('NOTIFICATION_EMAIL')
+    email_dispatcher = get_email_dispatcher()
     
-    if not resend.api_key or not notification_email:
-        app.logger.warning("Email notification skipped: Missing RESEND_API_KEY or NOTIFICATION_EMAIL")
+    if isinstance(email_dispatcher.provider, ResendEmailProvider) and (not email_dispatcher.provider.api_key or not notification_email):
+        current_app.logger.warning("Email notification skipped: Missing RESEND_API_KEY or NOTIFICATION_EMAIL")
         return False
     
-    try:
-        resend.Emails.send({
-            "from": "Portfolio <hello@joelezzahid.com>", 
-            "to": notification_email,
-            "subject": f"New Contact Form Submission from {submission.name}",
-            "html": f"""
-            <h2>New Contact Form Submission</h2>
-            <p><strong>Date:</strong> {submission.submission_date.strftime('%Y-%m-%d %H:%M:%S UTC')}</p>
-            <hr>
-            <p><strong>Name:</strong> {submission.name}</p>
-            <p><strong>Email:</strong> <a href="mailto:{submission.email}">{submission.email}</a></p>
-            <p><strong>Phone:</strong> {submission.phone or 'Not provided'}</p>
-            <hr>
-            <p><strong>Message:</strong></p>
-            <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
-                <pre style="white-space: pre-wrap; font-family: Arial, sans-serif;">{submission.message}</pre>
-            </div>
-            """
-        })
-        app.logger.info(f"Notification email sent successfully for submission from {submission.name}")
-        return True
-    except Exception as e:
-        app.logger.error(f"Failed to send email: {e}")
-        return False
+    return email_dispatcher.enqueue(build_notification_email(submission, notification_email))
+
+# --- Contact Submission Write Buffer ---
+def contact_submission_record(data, spam_reasons=None):
+    """A validated form payload as a JSON-serializable record for the write buffer or the spam batches."""
+    return {
+        'name': data.get('name'),
+        'email': data.get('email'),
+        'phone': data.get('phone'),
+        'message': data.get('message'),
+        'submission_date': datetime.now(timezone.utc).isoformat(),
+        'is_spam': spam_reasons is not None,
+        'spam_reasons': ','.join(spam_reasons)[:255] if spam_reasons is not None else None,
+    }
+
+def contact_submission_values(record):
+    """Insert values for a buffered record (records buffered before the spam filter have no spam fields)."""
+    return dict(
+        record,
+        submission_date=datetime.fromisoformat(record['submission_date']),
+        is_spam=record.get('is_spam', False),
+        spam_reasons=record.get('spam_reasons'),
+    )
+
+def buffer_contact_submission(data):
+    """
+    Appends a validated form payload to the write buffer and returns the submission,
+    not stored yet (no id); it is stored and notified about when the buffer is flushed.
+    """
+    record = contact_submission_record(data)
+    get_submission_buffer().append(record)
+    return ContactSubmission(**contact_submission_values(record))
+
+def store_buffered_submissions(records):
+    """
+    Inserts a batch from the write buffer with one multi-row INSERT, skipping records whose
+    buffer_id is already stored (the batch was stored, but not yet removed from the buffer,
+    before a crash), then queues the notification emails for the new rows.
+    """
+    buffer_ids = [record['buffer_id'] for record in records]
+    stored = set(db.session.scalars(
+        db.select(ContactSubmission.buffer_id).where(ContactSubmission.buffer_id.in_(buffer_ids))
+    ))
+    values = [contact_submission_values(record) for record in records if record['buffer_id'] not in stored]
+    if not values:
+        return
+    columns = (
+        ContactSubmission.id, ContactSubmission.name, ContactSubmission.email, ContactSubmission.phone,
+        ContactSubmission.message, ContactSubmission.submission_date, ContactSubmission.is_spam,
+    )
+    rows = db.session.execute(
+        db.insert(ContactSubmission).returning(*columns, sort_by_parameter_order=True), values
+    ).all()
+    db.session.commit()
+    current_app.logger.info(f"Stored {len(rows)} buffered contact submissions.")
+    for row in rows:
+        if not row.is_spam:
+            send_notification_email(row)
+
+# --- Contact Form Screening ---
+def store_spam_submissions(records):
+    """Inserts a batch of spam submissions from the SpamBatchWriter with one multi-row INSERT."""
+    db.session.execute(db.insert(ContactSubmission), [contact_submission_values(record) for record in records])
+    db.session.commit()
+    current_app.logger.info(f"Stored {len(records)} spam contact submissions.")
+
+def queue_spam_submission(data, reasons):
+    """Queues a spam submission for batched storage: through the write buffer when there is one."""
+    record = contact_submission_record(data, spam_reasons=reasons)
+    submission_buffer = get_submission_buffer()
+    if submission_buffer is not None:
+        submission_buffer.append(record)
+    else:
+        current_app.extensions['spam_batch_writer'].add(record)
+
+def release_contact_submission(data):
+    """Called when storing a screened submission failed, so the sender's retry isn't dropped as a duplicate."""
+    spam_filter = get_spam_filter()
+    if spam_filter is not None:
+        spam_filter.forget(data)
+
+def screen_contact_submission(data):
+    """
+    Runs the spam filter on a validated form payload. Returns the response for a duplicate
+    (dropped) or spam (queued for batched storage, no email), or None to process it normally.
+    Both are answered like an accepted submission, so senders can't tell them apart.
+    """
+    spam_filter = get_spam_filter()
+    if spam_filter is None:
+        return None
+    verdict = spam_filter.check(data)
+    status = 202 if get_submission_buffer() is not None else 201
+    if verdict['duplicate']:
+        metrics.count_screened_submission('duplicate')
+        current_app.logger.info(f"Dropped a duplicate contact form submission from {data.get('email')}.")
+        return jsonify({"message": "Form submitted successfully!"}), status
+    if verdict['spam']:
+        metrics.count_screened_submission('spam')
+        queue_spam_submission(data, verdict['reasons'])
+        current_app.logger.info(
+            f"Contact form submission from {data.get('email')} flagged as spam "
+            f"(score {verdict['score']:.1f}: {', '.join(verdict['reasons'])})."
+        )
+        return jsonify({"message": "Form submitted successfully!"}), status
+    metrics.count_screened_submission('accepted')
+    return None
 
 # --- API Endpoints ---
 
 # Authentication & Admin User Management
-@app.route('/api/admin/register', methods=['POST'])
+@api.route('/api/admin/register', methods=['POST'])
 def register_admin_api():
     data = request.get_json()
     username = data.get('username')
@@ -198,7 +1277,7 @@ def register_admin_api():
     db.session.commit()
     return jsonify({"message": "Admin user created successfully. Please login."}), 201
 
-@app.route('/api/admin/login', methods=['POST'])
+@api.route('/api/admin/login', methods=['POST'])
 def admin_login_api():
     data = request.get_json()
     username = data.get('username')
@@ -207,30 +1286,72 @@ def admin_login_api():
         return jsonify({"message": "Username and password required"}), 400
     user = AdminUser.query.filter_by(username=username).first()
     if user and user.check_password(password):
+        if user.rehash_password_if_outdated(password):
+            try:
+                db.session.commit()
+                current_app.logger.info(f"Upgraded the password hash of admin user {user.id} to {current_app.config['PASSWORD_HASH_METHOD']}.")
+            except Exception as e:
+                db.session.rollback()  # the old hash still works; try again on the next login
+                current_app.logger.warning(f"Could not store the upgraded password hash of admin user {user.id}: {e}")
         access_token = create_access_token(identity=str(user.id))
-        return jsonify(access_token=access_token, user={"id": user.id, "username": user.username}), 200
+        refresh_token = create_refresh_token(identity=str(user.id))
+        return jsonify(access_token=access_token, refresh_token=refresh_token, user={"id": user.id, "username": user.username}), 200
     return jsonify({"message": "Invalid credentials"}), 401
 
+@api.route('/api/admin/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def admin_refresh_token_api():
+    """
+    Trades a refresh token (Authorization: Bearer <refresh_token>) for a new access and
+    refresh token pair. The refresh token used is revoked, so each one works only once.
+    """
+    identity = get_jwt_identity()
+    revoke_token(get_jwt())
+    return jsonify(
+        access_token=create_access_token(identity=identity),
+        refresh_token=create_refresh_token(identity=identity),
+    ), 200
+
+@api.route('/api/admin/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def admin_logout_api():
+    """
+    Revokes the token in the Authorization header and, when given as JSON
+    {"refresh_token": "..."}, the user's refresh token too.
+    """
+    revoke_token(get_jwt())
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+        except (JWTExtendedException, PyJWTError):
+            refresh_claims = None  # expired or invalid: nothing left to revoke
+        if refresh_claims and refresh_claims['sub'] == get_jwt_identity():
+            revoke_token(refresh_claims)
+    return jsonify({"message": "Logged out"}), 200
+
 # --- Admin Project CRUD APIs ---
-@app.route('/api/admin/projects', methods=['GET'])
+@api.route('/api/admin/projects', methods=['GET'])
 @jwt_required()
 def admin_get_all_projects_api():
     current_user_id = get_jwt_identity()
-    app.logger.info(f"Admin user {current_user_id} fetching all projects.")
+    current_app.logger.info(f"Admin user {current_user_id} fetching all projects.")
+    options, errors = parse_project_listing_args(request.args)
+    if errors:
+        return jsonify({"message": "Invalid query parameters", "errors": errors}), 400
     try:
-        projects = Project.query.order_by(Project.date_added.desc()).all()
-        return jsonify([p.to_dict(include_image_url_base=request.host_url) for p in projects]), 200
+        return jsonify(project_listing_payload(options)), 200
     except Exception as e:
-        app.logger.error(f"Error fetching projects for admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"Error fetching projects for admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Could not retrieve projects", "error_details": str(e)}), 500
 
-@app.route('/api/admin/projects', methods=['POST'])
+@api.route('/api/admin/projects', methods=['POST'])
 @jwt_required()
 def admin_create_project_api():
     current_user_id = get_jwt_identity()
-    app.logger.info(f"Admin user {current_user_id} attempting to create a project.")
-    app.logger.debug(f"Received Form Data for POST /api/admin/projects: {request.form}")
-    app.logger.debug(f"Received Files for POST /api/admin/projects: {request.files}")
+    current_app.logger.info(f"Admin user {current_user_id} attempting to create a project.")
+    current_app.logger.debug(f"Received Form Data for POST /api/admin/projects: {request.form}")
+    current_app.logger.debug(f"Received Files for POST /api/admin/projects: {request.files}")
 
     errors = {}
     name = request.form.get('name')
@@ -271,22 +1392,25 @@ def admin_create_project_api():
         )
         db.session.add(new_project)
         db.session.commit()
-        app.logger.info(f"Project '{new_project.name}' created by admin {current_user_id}.")
-        return jsonify(new_project.to_dict(include_image_url_base=request.host_url)), 201
     except IntegrityError as e: 
         db.session.rollback()
-        app.logger.error(f"DB IntegrityError on create project by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"DB IntegrityError on create project by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Database integrity error.", "error_details": str(e.orig)}), 409
     except DataError as e:
         db.session.rollback()
-        app.logger.error(f"DB DataError on create project by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"DB DataError on create project by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Database data error (e.g., data too long).", "error_details": str(e.orig)}), 422
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Unexpected error creating project by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"Unexpected error creating project by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "An unexpected error occurred.", "error_details": str(e)}), 500
 
-@app.route('/api/admin/projects/<int:project_id>', methods=['PUT'])
+    run_post_commit(publish_project_changes)
+    run_post_commit(schedule_image_processing, new_project.id, image_filename)
+    current_app.logger.info(f"Project '{new_project.name}' created by admin {current_user_id}.")
+    return jsonify(new_project.to_dict(include_image_url_base=request.host_url)), 201
+
+@api.route('/api/admin/projects/<int:project_id>', methods=['PUT'])
 @jwt_required()
 def admin_update_project_api(project_id):
     current_user_id = get_jwt_identity()
@@ -294,9 +1418,9 @@ def admin_update_project_api(project_id):
     if not project:
         return jsonify({"message": "Project not found"}), 404
     
-    app.logger.info(f"Admin user {current_user_id} attempting to update project ID {project_id}.")
-    app.logger.debug(f"Received Form Data for PUT /api/admin/projects/{project_id}: {request.form}")
-    app.logger.debug(f"Received Files for PUT /api/admin/projects/{project_id}: {request.files}")
+    current_app.logger.info(f"Admin user {current_user_id} attempting to update project ID {project_id}.")
+    current_app.logger.debug(f"Received Form Data for PUT /api/admin/projects/{project_id}: {request.form}")
+    current_app.logger.debug(f"Received Files for PUT /api/admin/projects/{project_id}: {request.files}")
 
     errors = {}
     name = request.form.get('name', project.name) 
@@ -322,11 +1446,6 @@ def admin_update_project_api(project_id):
                     if len(candidate_filename) > 100:
                             errors['image'] = "Processed new image filename is too long (max 100)."
                     else:
-                        if project.image_filename:
-                            old_image_path = os.path.join(app.config['UPLOAD_FOLDER'], project.image_filename)
-                            if os.path.exists(old_image_path):
-                                try: os.remove(old_image_path)
-                                except OSError as e: app.logger.warning(f"Error deleting old image {project.image_filename}: {e}")
                         new_image_filename = candidate_filename 
                 else: 
                     errors['image'] = "New image could not be saved. Check server logs or file type."
@@ -336,26 +1455,36 @@ def admin_update_project_api(project_id):
     project.name = name.strip()
     project.description = description.strip() if description else None
     project.project_url = project_url.strip() if project_url else None
+    image_replaced = new_image_filename != project.image_filename
+    old_image_files = project_image_files(project) if image_replaced else set()
+    if image_replaced:
+        project.image_variants = None
     project.image_filename = new_image_filename
 
     try:
         db.session.commit()
-        app.logger.info(f"Project ID {project_id} updated by admin {current_user_id}.")
-        return jsonify(project.to_dict(include_image_url_base=request.host_url)), 200
     except IntegrityError as e:
         db.session.rollback()
-        app.logger.error(f"DB IntegrityError on update project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"DB IntegrityError on update project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Database integrity error during update.", "error_details": str(e.orig)}), 409
     except DataError as e:
         db.session.rollback()
-        app.logger.error(f"DB DataError on update project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"DB DataError on update project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Database data error during update.", "error_details": str(e.orig)}), 422
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Unexpected error updating project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"Unexpected error updating project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "An unexpected error occurred during update.", "error_details": str(e)}), 500
 
-@app.route('/api/admin/projects/<int:project_id>', methods=['DELETE'])
+    run_post_commit(publish_project_changes)
+    if image_replaced:
+        # Only drop the previous image once the project no longer points at it.
+        remove_image_files(*old_image_files)
+        run_post_commit(schedule_image_processing, project.id, new_image_filename)
+    current_app.logger.info(f"Project ID {project_id} updated by admin {current_user_id}.")
+    return jsonify(project.to_dict(include_image_url_base=request.host_url)), 200
+
+@api.route('/api/admin/projects/<int:project_id>', methods=['DELETE'])
 @jwt_required()
 def admin_delete_project_api(project_id):
     current_user_id = get_jwt_identity()
@@ -363,39 +1492,177 @@ def admin_delete_project_api(project_id):
     if not project:
         return jsonify({"message": "Project not found"}), 404
     try:
-        image_to_delete = project.image_filename 
+        images_to_delete = project_image_files(project)
         db.session.delete(project)
         db.session.commit()
-        if image_to_delete:
-            image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_to_delete)
-            if os.path.exists(image_path):
-                try: os.remove(image_path)
-                except OSError as e: app.logger.warning(f"Error deleting image file {image_to_delete}: {e}")
-        app.logger.info(f"Project ID {project_id} deleted by admin {current_user_id}.")
-        return jsonify({"message": "Project deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error deleting project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
+        current_app.logger.error(f"Error deleting project ID {project_id} by admin {current_user_id}: {e}", exc_info=True)
         return jsonify({"message": "Failed to delete project", "error_details": str(e)}), 500
 
+    run_post_commit(publish_project_changes)
+    remove_image_files(*images_to_delete)
+    current_app.logger.info(f"Project ID {project_id} deleted by admin {current_user_id}.")
+    return jsonify({"message": "Project deleted successfully"}), 200
+
+@api.route('/api/admin/projects/batch', methods=['POST'])
+@jwt_required()
+def admin_batch_projects_api():
+    """
+    Creates, updates and deletes projects in one request and one transaction.
+    Expects JSON: {"create": [{"name", "description", "project_url"}, ...],
+                   "update": [{"id", ...fields to change}, ...], "delete": [id, ...]}
+    Responds with a result per item ({"index"|"id", "status", "project"|"errors"|"message"});
+    invalid or missing items are skipped and the rest is committed. Images are uploaded
+    through the single-project endpoints; deleted projects' images are removed after commit.
+    """
+    current_user_id = get_jwt_identity()
+    batch, error = parse_batch_request(request.get_json(silent=True), ('create', 'update', 'delete'))
+    if error:
+        return jsonify({"message": error}), 400
+    delete_ids = parse_batch_ids(batch['delete'])
+    if delete_ids is None:
+        return jsonify({"message": "delete must be a list of project ids."}), 400
+    current_app.logger.info(
+        f"Admin user {current_user_id} running a project batch: {len(batch['create'])} create, "
+        f"{len(batch['update'])} update, {len(batch['delete'])} delete."
+    )
+
+    try:
+        results, images_to_delete = apply_project_batch(batch, delete_ids)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        current_app.logger.error(f"DB IntegrityError on project batch by admin {current_user_id}: {e}", exc_info=True)
+        return jsonify({"message": "Database integrity error.", "error_details": str(e.orig)}), 409
+    except DataError as e:
+        db.session.rollback()
+        current_app.logger.error(f"DB DataError on project batch by admin {current_user_id}: {e}", exc_info=True)
+        return jsonify({"message": "Database data error (e.g., data too long).", "error_details": str(e.orig)}), 422
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Unexpected error in project batch by admin {current_user_id}: {e}", exc_info=True)
+        return jsonify({"message": "An unexpected error occurred.", "error_details": str(e)}), 500
+
+    run_post_commit(publish_project_changes)
+    remove_image_files(*images_to_delete)
+    serialize = project_serializer(request.host_url)
+    for operation_results in results.values():
+        for result in operation_results:
+            if 'row' in result:
+                result['project'] = serialize(result.pop('row'))
+    return jsonify(results), 200
+
 # --- PUBLIC API Endpoint ---
-@app.route('/api/projects', methods=['GET'])
+@api.route('/api/projects', methods=['GET'])
 def get_public_projects_api():
-    app.logger.info("Public request to /api/projects")
+    current_app.logger.info("Public request to /api/projects")
+    options, errors = parse_project_listing_args(request.args)
+    if errors:
+        return jsonify({"message": "Invalid query parameters", "errors": errors}), 400
+
+    def build_feed_body():
+        return jsonify(project_listing_payload(options)).get_data()
+
     try:
-        projects = Project.query.order_by(Project.date_added.desc()).all()
-        return jsonify([p.to_dict(include_image_url_base=request.host_url) for p in projects])
+        feed = get_project_feed_cache().get_or_build(public_projects_cache_key(options), build_feed_body)
     except Exception as e:
-        app.logger.error(f"Error fetching public projects: {e}", exc_info=True)
+        current_app.logger.error(f"Error fetching public projects: {e}", exc_info=True)
         return jsonify({"message": "Could not retrieve projects", "error_details": str(e)}), 500
 
+    return project_feed_response(feed)
+
 # --- Route to serve uploaded files ---
-@app.route('/uploads/<path:filename>')
+@api.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    """
+    Serves an uploaded image with a long-lived immutable Cache-Control. Conditional
+    (If-None-Match/If-Modified-Since) and Range requests are handled by send_file;
+    content-hashed files use their hash as the strong ETag. Hot files can be served from
+    an in-memory cache (UPLOADS_MEMORY_CACHE_BYTES), the rest with sendfile. With a remote
+    storage backend this only redirects to the object's URL.
+    """
+    direct_url = get_image_storage().url(filename)
+    if direct_url:
+        return redirect(direct_url)
+
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    match = CONTENT_HASHED_NAME.match(filename)
+    etag = os.path.splitext(filename)[0] if match else True
+
+    if current_app.config['UPLOADS_SENDFILE_MODE'] == 'x-accel':
+        file_path = safe_join(upload_folder, filename)
+        if file_path is None or not os.path.isfile(file_path):
+            abort(404)
+        # nginx serves the bytes (and handles Range); we only answer revalidations here.
+        response = current_app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{current_app.config['UPLOADS_ACCEL_PREFIX'].rstrip('/')}/{filename}"
+        response.set_etag(etag if match else f"{os.path.getmtime(file_path)}-{os.path.getsize(file_path)}")
+        response.last_modified = datetime.fromtimestamp(os.path.getmtime(file_path), timezone.utc)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            del response.headers['X-Accel-Redirect']
+    else:
+        hot_entry = hot_upload_entry(upload_folder, filename)
+        if hot_entry is not None:
+            response = hot_upload_response(hot_entry)
+        else:
+            response = send_from_directory(upload_folder, filename, etag=etag, max_age=current_app.config['UPLOADS_MAX_AGE'])
+
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['UPLOADS_MAX_AGE']
+    response.cache_control.immutable = True
+    return response
+
+def hot_upload_entry(upload_folder, filename):
+    """
+    The memory cache entry for an upload, reading the file into the cache once it is hot.
+    None means it is served from disk (cache disabled, cold, too large or missing).
+    Entries are checked against the file on every hit: another worker may have deleted
+    or replaced it, and only that worker's cache is told.
+    """
+    cache = get_uploads_memory_cache()
+    if cache is None:
+        return None
+    file_path = safe_join(upload_folder, filename)
+    if file_path is None:
+        return None
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        cache.discard(filename)
+        return None
+    entry = cache.get(filename)
+    if entry is not None:
+        if entry['stat'] == (stat.st_mtime_ns, stat.st_size):
+            return entry
+        cache.discard(filename)
+    try:
+        if not os.path.isfile(file_path) or not cache.should_admit(filename, stat.st_size):
+            return None
+        with open(file_path, 'rb') as f:
+            body = f.read()
+    except OSError:
+        return None
+    match = CONTENT_HASHED_NAME.match(filename)
+    # The same ETag send_file gives the file when it is served from disk.
+    etag = os.path.splitext(filename)[0] if match else f"{stat.st_mtime}-{stat.st_size}-{adler32(file_path.encode()) & 0xFFFFFFFF}"
+    return cache.put(
+        filename, body, etag,
+        datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+        mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        stat=(stat.st_mtime_ns, stat.st_size),
+    )
+
+def hot_upload_response(entry):
+    response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    response.expires = int(time.time() + current_app.config['UPLOADS_MAX_AGE'])
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(entry['body']))
 
 # --- Contact Form API Endpoints ---
-@app.route('/api/form_submit', methods=['POST'])
+@api.route('/api/form_submit', methods=['POST'])
 def handle_form_submit():
     """
     Handles submissions from the main contact form.
@@ -410,16 +1677,24 @@ def handle_form_submit():
     phone = data.get('phone')  # Optional
     message = data.get('message')
 
-    errors = {}
-    if not name: errors['name'] = "Name is required."
-    if not email: errors['email'] = "Email is required."
-    if not message: errors['message'] = "Message is required."
-    # Basic email format check
-    if email and '@' not in email: errors['email_format'] = "Invalid email format."
-
+    errors = contact_form_errors(data)
     if errors:
         return jsonify({"message": "Validation errors", "errors": errors}), 422
 
+    screened = screen_contact_submission(data)
+    if screened is not None:
+        return screened
+
+    if get_submission_buffer() is not None:
+        try:
+            submission = buffer_contact_submission(data)
+        except Exception as e:
+            release_contact_submission(data)
+            current_app.logger.error(f"Error buffering form submission: {e}", exc_info=True)
+            return jsonify({"message": "An unexpected error occurred while processing the form.", "error_details": str(e)}), 500
+        current_app.logger.info(f"Buffered contact form submission from {name} ({email}).")
+        return jsonify({"message": "Form submitted successfully!", "submission": submission.to_dict()}), 202
+
     try:
         new_submission = ContactSubmission(
             name=name,
@@ -429,10 +1704,10 @@ def handle_form_submit():
         )
         db.session.add(new_submission)
         db.session.commit()
-        app.logger.info(f"New contact form submission from {name} ({email}).")
+        current_app.logger.info(f"New contact form submission from {name} ({email}).")
         
-        # Send email notification (non-blocking)
-        email_sent = send_notification_email(new_submission)
+        # Hand the email to the background dispatcher; delivery and retries happen off-request
+        email_queued = send_notification_email(new_submission)
         
         response_data = {
             "message": "Form submitted successfully!",
@@ -440,64 +1715,93 @@ def handle_form_submit():
         }
         
         # Optionally include email status in debug mode
-        if app.debug:
-            response_data["email_notification_sent"] = email_sent
+        if current_app.debug:
+            response_data["email_notification_queued"] = email_queued
             
         return jsonify(response_data), 201
         
     except IntegrityError as e:
         db.session.rollback()
-        app.logger.error(f"Database integrity error on form submission: {e}", exc_info=True)
+        release_contact_submission(data)
+        current_app.logger.error(f"Database integrity error on form submission: {e}", exc_info=True)
         return jsonify({"message": "Could not process form due to a database conflict.", "error_details": str(e.orig)}), 409
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error processing form submission: {e}", exc_info=True)
+        release_contact_submission(data)
+        current_app.logger.error(f"Error processing form submission: {e}", exc_info=True)
         return jsonify({"message": "An unexpected error occurred while processing the form.", "error_details": str(e)}), 500
 
-@app.route('/api/form_data', methods=['POST'])
+@api.route('/api/form_data', methods=['POST'])
 def handle_form_data_ping():
     """
     Handles the POST request made by the frontend's useEffect on mount.
     Expects JSON: {"form_name": "...", "form_email": "...", "form_phone": "...", "form_message": "..."}
-    Currently, this endpoint just logs the data and acknowledges.
+    Logs the data and answers with the spam filter's timing token (form_token) for the submission.
     """
     if not request.is_json:
         return jsonify({"message": "Request must be JSON"}), 400
 
     data = request.get_json()
-    app.logger.info(f"Received initial form data ping: {data}")
+    current_app.logger.info(f"Received initial form data ping: {data}")
 
-    return jsonify({"message": "Initial form data received."}), 200
+    response_data = {"message": "Initial form data received."}
+    spam_filter = get_spam_filter()
+    if spam_filter is not None:
+        response_data["form_token"] = spam_filter.issue_token()
+    return jsonify(response_data), 200
 
 # --- Admin Contact Submission Endpoints ---
-@app.route('/api/admin/contact-submissions', methods=['GET'])
+@api.route('/api/admin/contact-submissions', methods=['GET'])
 @jwt_required()
 def admin_get_contact_submissions():
     current_user_id = get_jwt_identity()
-    app.logger.info(f"Admin user {current_user_id} fetching contact submissions.")
+    current_app.logger.info(f"Admin user {current_user_id} fetching contact submissions.")
     
+    # Get query parameters for pagination and search
+    options, errors = parse_contact_submission_listing_args(request.args)
+    if errors:
+        return jsonify({"message": "Invalid query parameters", "errors": errors}), 400
+
     try:
-        # Get query parameters for pagination
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
-        # Query with pagination
-        submissions = ContactSubmission.query.order_by(
-            ContactSubmission.submission_date.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
-        
-        return jsonify({
-            'submissions': [s.to_dict() for s in submissions.items],
-            'total': submissions.total,
-            'pages': submissions.pages,
-            'current_page': page
-        }), 200
+        dialect = db.engine.dialect.name
+        count_statement, total_estimated = contact_submissions_count_statement(options, dialect)
+        total = db.session.scalar(count_statement) if count_statement is not None else None
+        rows = db.session.execute(contact_submissions_page_statement(options, dialect)).all()
+        return jsonify(contact_submission_listing_payload(rows, total, options, total_estimated)), 200
         
     except Exception as e:
-        app.logger.error(f"Error fetching contact submissions: {e}", exc_info=True)
+        current_app.logger.error(f"Error fetching contact submissions: {e}", exc_info=True)
         return jsonify({"message": "Could not retrieve submissions", "error_details": str(e)}), 500
 
-@app.route('/api/admin/contact-submissions/<int:submission_id>', methods=['GET'])
+@api.route('/api/admin/contact-submissions/export', methods=['GET'])
+@jwt_required()
+def admin_export_contact_submissions():
+    """
+    Downloads all submissions as NDJSON (?format=ndjson, the default) or CSV (?format=csv),
+    streamed in batches of CONTACT_SUBMISSIONS_EXPORT_BATCH_SIZE rows.
+    """
+    current_user_id = get_jwt_identity()
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in CONTACT_SUBMISSION_EXPORT_FORMATS:
+        return jsonify({"message": f"format must be one of: {', '.join(CONTACT_SUBMISSION_EXPORT_FORMATS)}."}), 400
+    current_app.logger.info(f"Admin user {current_user_id} exporting contact submissions as {export_format}.")
+
+    def generate():
+        try:
+            yield from export_contact_submissions(export_format, current_app.config['CONTACT_SUBMISSIONS_EXPORT_BATCH_SIZE'])
+        except Exception as e:
+            # The status line is already sent; failing the stream leaves the client with a truncated download.
+            current_app.logger.error(f"Error exporting contact submissions: {e}", exc_info=True)
+            raise
+
+    filename = f"contact-submissions-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    response = current_app.response_class(
+        stream_with_context(generate()), mimetype=CONTACT_SUBMISSION_EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@api.route('/api/admin/contact-submissions/<int:submission_id>', methods=['GET'])
 @jwt_required()
 def admin_get_contact_submission(submission_id):
     current_user_id = get_jwt_identity()
@@ -508,7 +1812,7 @@ def admin_get_contact_submission(submission_id):
         
     return jsonify(submission.to_dict()), 200
 
-@app.route('/api/admin/contact-submissions/<int:submission_id>', methods=['DELETE'])
+@api.route('/api/admin/contact-submissions/<int:submission_id>', methods=['DELETE'])
 @jwt_required()
 def admin_delete_contact_submission(submission_id):
     current_user_id = get_jwt_identity()
@@ -520,31 +1824,326 @@ def admin_delete_contact_submission(submission_id):
     try:
         db.session.delete(submission)
         db.session.commit()
-        app.logger.info(f"Contact submission ID {submission_id} deleted by admin {current_user_id}.")
+        current_app.logger.info(f"Contact submission ID {submission_id} deleted by admin {current_user_id}.")
         return jsonify({"message": "Submission deleted successfully"}), 200
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error deleting submission ID {submission_id}: {e}", exc_info=True)
+        current_app.logger.error(f"Error deleting submission ID {submission_id}: {e}", exc_info=True)
         return jsonify({"message": "Failed to delete submission", "error_details": str(e)}), 500
 
-# --- Database Initialization ---
-with app.app_context():
-    db.create_all()
-    print("Database tables checked/created (AdminUser, Project, ContactSubmission).")
-    
+@api.route('/api/admin/contact-submissions/batch', methods=['POST'])
+@jwt_required()
+def admin_batch_contact_submissions():
+    """
+    Deletes many submissions (e.g. a wave of spam) in one transaction.
+    Expects JSON: {"delete": [id, ...]}; responds with {"delete": [{"id", "status"}, ...]}.
+    """
+    current_user_id = get_jwt_identity()
+    batch, error = parse_batch_request(request.get_json(silent=True), ('delete',))
+    if error:
+        return jsonify({"message": error}), 400
+    submission_ids = parse_batch_ids(batch['delete'])
+    if submission_ids is None:
+        return jsonify({"message": "delete must be a list of submission ids."}), 400
+
+    try:
+        deleted = set()
+        for chunk in chunked(submission_ids):
+            deleted.update(db.session.scalars(
+                db.delete(ContactSubmission).where(ContactSubmission.id.in_(chunk))
+                .returning(ContactSubmission.id)
+                .execution_options(synchronize_session=False)
+            ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error batch deleting submissions: {e}", exc_info=True)
+        return jsonify({"message": "Failed to delete submissions", "error_details": str(e)}), 500
+
+    current_app.logger.info(f"{len(deleted)} contact submissions deleted by admin {current_user_id}.")
+    return jsonify({"delete": [
+        {'id': submission_id, 'status': 200} if submission_id in deleted
+        else {'id': submission_id, 'status': 404, 'message': "Submission not found"}
+        for submission_id in submission_ids
+    ]}), 200
+
+# --- Admin Diagnostics ---
+@api.route('/api/admin/db-pool', methods=['GET'])
+@jwt_required()
+def admin_db_pool_stats():
+    """Connection pool state (checked out, overflow) and checkout wait times for this worker."""
+    return jsonify(pool_stats.snapshot(db.engine.pool)), 200
+
+@api.route('/api/admin/uploads-cache', methods=['GET'])
+@jwt_required()
+def admin_uploads_cache_stats():
+    """Size, hit ratio and evictions of this worker's in-memory cache of hot uploads."""
+    uploads_memory_cache = get_uploads_memory_cache()
+    if uploads_memory_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **uploads_memory_cache.stats()}), 200
+
+def metrics_token_valid(authorization):
+    token = current_app.config['METRICS_TOKEN']
+    scheme, _, credentials = authorization.partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip(), token)
+
+@api.route('/metrics', methods=['GET'])
+def metrics_api():
+    """
+    Prometheus text-format metrics for this worker: per-route latency, SQL counts and
+    durations per request, instrumented operations and connection pool state.
+    Authorized with "Bearer <METRICS_TOKEN>" or an admin access token.
+    """
+    if not metrics_token_valid(request.headers.get('Authorization', '')):
+        verify_jwt_in_request()
+    pool = pool_stats.snapshot(db.engine.pool)
+    gauges = {f"db_pool_{name}": value for name, value in pool.items() if isinstance(value, (int, float))}
+    uploads_memory_cache = get_uploads_memory_cache()
+    if uploads_memory_cache is not None:
+        gauges.update({f"uploads_memory_cache_{name}": value for name, value in uploads_memory_cache.stats().items()})
+    submission_buffer = get_submission_buffer()
+    if submission_buffer is not None:
+        gauges.update({f"submission_buffer_{name}": value for name, value in submission_buffer.stats().items()})
+    spam_batch_writer = current_app.extensions.get('spam_batch_writer')
+    if spam_batch_writer is not None:
+        gauges['spam_batch_writer_dropped'] = spam_batch_writer.dropped
+    return current_app.response_class(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# --- CLI Commands ---
+# Schema changes and seeding run as a deploy step, not on worker boot:
+#   flask --app main db upgrade
+#   flask --app main seed-admin
+# and retention runs daily from cron:
+#   flask --app main submissions retention
+db_cli = AppGroup('db', help="Database schema migrations.")
+
+@db_cli.command('upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations."""
+    applied = migrations.upgrade(db.engine, log=click.echo)
+    if not applied:
+        click.echo("Database schema is up to date.")
+
+@db_cli.command('status')
+def db_status_command():
+    """List migrations that have not been applied yet."""
+    pending = migrations.pending_migrations(db.engine)
+    if not pending:
+        click.echo("Database schema is up to date.")
+    for version, description, _ in pending:
+        click.echo(f"Pending migration {version}: {description}")
+
+@click.command('seed-admin')
+@with_appcontext
+def seed_admin_command():
+    """Create the default admin user, or reset its password when RESET_ADMIN_PASSWORD is set."""
     admin_username = os.environ.get('DEFAULT_ADMIN_USERNAME', 'admin')
-    if not AdminUser.query.filter_by(username=admin_username).first():
+    admin = AdminUser.query.filter_by(username=admin_username).first()
+    if not admin:
         default_admin_password = os.environ.get('DEFAULT_ADMIN_PASSWORD', 'adminpass123')
         admin = AdminUser(username=admin_username)
         admin.set_password(default_admin_password)
         db.session.add(admin)
         db.session.commit()
-        print(f"Default admin user '{admin_username}' created/ensured.")
-    elif os.environ.get('RESET_ADMIN_PASSWORD') and AdminUser.query.filter_by(username=admin_username).first():
-        admin_to_reset = AdminUser.query.filter_by(username=admin_username).first()
-        admin_to_reset.set_password(os.environ.get('RESET_ADMIN_PASSWORD'))
+        click.echo(f"Default admin user '{admin_username}' created/ensured.")
+    elif os.environ.get('RESET_ADMIN_PASSWORD'):
+        admin.set_password(os.environ.get('RESET_ADMIN_PASSWORD'))
         db.session.commit()
-        print(f"Admin user '{admin_username}' password has been reset.")
+        click.echo(f"Admin user '{admin_username}' password has been reset.")
+
+password_cli = AppGroup('password', help="Admin password hashing.")
+
+@password_cli.command('calibrate')
+@click.option('--algorithm', type=click.Choice(passwords.ALGORITHMS), default='scrypt', show_default=True)
+@click.option('--target-ms', type=float, default=250, show_default=True, help="Wanted time of one verification.")
+@click.option('--max-memory-mib', type=int, default=128, show_default=True, help="Memory cap per hash (scrypt, argon2id).")
+def password_calibrate_command(algorithm, target_ms, max_memory_mib):
+    """Time hashing costs on this machine and suggest PASSWORD_HASH_METHOD."""
+    current = current_app.config['PASSWORD_HASH_METHOD']
+    click.echo(f"Current PASSWORD_HASH_METHOD={current}: {passwords.time_verify(current) * 1000:.0f} ms per verification")
+    chosen = passwords.calibrate(
+        algorithm, target_ms / 1000, max_memory_mib,
+        on_result=lambda method, seconds: click.echo(f"  {method:<28} {seconds * 1000:7.0f} ms"),
+    )
+    method, seconds = chosen
+    click.echo(f"Suggested: PASSWORD_HASH_METHOD={method} ({seconds * 1000:.0f} ms per verification)")
+    click.echo("Existing hashes are upgraded on each admin's next login.")
+
+submissions_cli = AppGroup('submissions', help="Contact submission write buffer.")
+
+@submissions_cli.command('flush')
+def submissions_flush_command():
+    """Store everything waiting in the write buffer now (e.g. before turning the buffer off)."""
+    submission_buffer = get_submission_buffer()
+    if submission_buffer is None:
+        raise click.ClickException("CONTACT_SUBMISSION_BUFFER_PATH is not set.")
+    click.echo(f"Stored {submission_buffer.flush()} buffered submissions; {submission_buffer.pending()} still pending.")
+
+@submissions_cli.command('retention')
+@click.option('--retention-months', type=int, default=None, help="Override CONTACT_SUBMISSION_RETENTION_MONTHS.")
+def submissions_retention_command(retention_months):
+    """Create upcoming partitions, then archive and drop submissions past the retention period."""
+    if retention_months is None:
+        retention_months = current_app.config['CONTACT_SUBMISSION_RETENTION_MONTHS']
+    target = retention.create_archive_target(current_app.config) if retention_months > 0 else None
+    archived = retention.run_retention(
+        db.engine, target, serialize_contact_submission, retention_months,
+        months_ahead=current_app.config['CONTACT_SUBMISSION_PARTITIONS_AHEAD'],
+        log=click.echo,
+    )
+    click.echo(f"Archived {archived} submissions." if retention_months > 0 else "Retention is off (CONTACT_SUBMISSION_RETENTION_MONTHS=0).")
+
+@click.command('publish-snapshot')
+@with_appcontext
+def publish_snapshot_command():
+    """Write the static project snapshot now (first deploy, or after changing SNAPSHOT_* settings)."""
+    snapshot_publisher = current_app.extensions.get('snapshot_publisher')
+    if snapshot_publisher is None:
+        raise click.ClickException("SNAPSHOT_BACKEND is not set.")
+    click.echo(f"Published project snapshot {snapshot_publisher.publish()}.")
+
+# --- Application Factory ---
+def create_app(config_overrides=None):
+    """
+    Builds the Flask app. Extensions are bound lazily and nothing here talks to the
+    database, so gunicorn workers start serving immediately; run `flask db upgrade`
+    and `flask seed-admin` to prepare the database.
+    """
+    app = Flask(__name__)
+    load_config(app)
+    if config_overrides:
+        app.config.update(config_overrides)
+    if app.config['JSON_PROVIDER'] == 'orjson':
+        if orjson_available():
+            app.json = OrjsonJSONProvider(app)
+        else:
+            app.logger.warning("JSON_PROVIDER is 'orjson' but orjson is not installed; using the default encoder.")
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        pool_size=app.config['DB_POOL_SIZE'],
+        max_overflow=app.config['DB_MAX_OVERFLOW'],
+        pool_timeout=app.config['DB_POOL_TIMEOUT'],
+        pool_recycle=app.config['DB_POOL_RECYCLE'],
+        pre_ping=app.config['DB_POOL_PRE_PING'],
+        statement_timeout_ms=app.config['DB_STATEMENT_TIMEOUT_MS'],
+        connect_timeout=app.config['DB_CONNECT_TIMEOUT'],
+        pgbouncer=app.config['DB_PGBOUNCER'],
+    ))
+
+    # Updated CORS configuration
+    allowed_origins = os.environ.get(
+        'ALLOWED_ORIGINS',
+        'http://localhost:5173,https://www.joelezzahid.com'
+    ).split(',')
+
+    cors.init_app(
+        app,
+        resources={r"/api/*": {"origins": allowed_origins}},
+        allow_headers=["Authorization", "Content-Type"],
+        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        supports_credentials=True
+    )
+    db.init_app(app)
+    jwt.init_app(app)
+    if app.config['JWT_VERIFY_CACHE_SIZE'] > 0:
+        app.extensions['jwt_verify_cache'] = VerifiedTokenCache(
+            app.config['JWT_VERIFY_CACHE_SIZE'], leeway=app.config['JWT_DECODE_LEEWAY']
+        )
+    app.extensions['token_blocklist'] = create_token_blocklist(app.config, db, RevokedToken, logger=app.logger)
+    with app.app_context():
+        install_pool_listeners(
+            db.engine,
+            statement_timeout_ms=app.config['DB_STATEMENT_TIMEOUT_MS'],
+            pgbouncer=app.config['DB_PGBOUNCER'],
+        )
+        init_request_metrics(app, db.engine)
+    init_rate_limiting(app, {
+        'api.handle_form_submit': 'RATE_LIMIT_FORM_SUBMIT',
+        'api.admin_login_api': 'RATE_LIMIT_ADMIN_AUTH',
+        'api.register_admin_api': 'RATE_LIMIT_ADMIN_AUTH',
+    })
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    elif app.config['RATE_LIMIT_ENABLED']:
+        app.logger.warning(
+            "Rate limiting is on with PROXY_FIX_X_FOR=0: behind a proxy or load balancer all "
+            "clients share its IP and are throttled together. Set PROXY_FIX_X_FOR to the number of proxies."
+        )
+
+    app.extensions['image_storage'] = create_image_storage(app.config)
+    app.extensions['image_executor'] = ThreadPoolExecutor(
+        max_workers=app.config['IMAGE_WORKERS'], thread_name_prefix='image-processing'
+    )
+    app.extensions['project_feed_cache'] = ProjectFeedCache(app.config['PROJECT_FEED_CACHE_TTL'])
+    if app.config['UPLOADS_MEMORY_CACHE_BYTES'] > 0:
+        app.extensions['uploads_memory_cache'] = UploadMemoryCache(
+            app.config['UPLOADS_MEMORY_CACHE_BYTES'],
+            app.config['UPLOADS_MEMORY_CACHE_MAX_FILE_BYTES'],
+            admit_after=app.config['UPLOADS_MEMORY_CACHE_ADMIT_AFTER'],
+        )
+    email_dispatcher = EmailDispatcher(
+        create_email_provider(app.config['EMAIL_PROVIDER']),
+        max_queue=app.config['EMAIL_QUEUE_SIZE'],
+        workers=app.config['EMAIL_WORKERS'],
+        max_attempts=app.config['EMAIL_MAX_ATTEMPTS'],
+        backoff_seconds=app.config['EMAIL_RETRY_BACKOFF'],
+        logger=app.logger,
+        on_send=lambda seconds: metrics.observe_operation('email_send', seconds),
+    )
+    atexit.register(email_dispatcher.shutdown)
+    app.extensions['email_dispatcher'] = email_dispatcher
+    if app.config['SPAM_FILTER_ENABLED']:
+        app.extensions['spam_filter'] = SpamFilter(
+            app.config['SECRET_KEY'],
+            create_dedup_backend(app.config),
+            threshold=app.config['SPAM_SCORE_THRESHOLD'],
+            dedup_seconds=app.config['SPAM_DEDUP_SECONDS'],
+            min_fill_seconds=app.config['SPAM_MIN_FILL_SECONDS'],
+            token_max_age=app.config['SPAM_TOKEN_MAX_AGE'],
+            scorers=[import_string(name.strip()) for name in app.config['SPAM_SCORERS'].split(',') if name.strip()],
+            logger=app.logger,
+        )
+        spam_batch_writer = SpamBatchWriter(
+            app, store_spam_submissions,
+            batch_size=app.config['SPAM_BATCH_SIZE'],
+            flush_interval=app.config['SPAM_FLUSH_SECONDS'],
+        )
+        atexit.register(spam_batch_writer.flush)
+        app.extensions['spam_batch_writer'] = spam_batch_writer
+    if app.config['CONTACT_SUBMISSION_BUFFER_PATH']:
+        submission_buffer = SubmissionBuffer(
+            app, app.config['CONTACT_SUBMISSION_BUFFER_PATH'], store_buffered_submissions,
+            batch_size=app.config['CONTACT_SUBMISSION_BUFFER_BATCH_SIZE'],
+            flush_interval=app.config['CONTACT_SUBMISSION_BUFFER_FLUSH_SECONDS'],
+            lease_seconds=app.config['CONTACT_SUBMISSION_BUFFER_LEASE_SECONDS'],
+        )
+        # Each worker starts its flusher on its first request, which also stores what a
+        # previous run left in the buffer. Its atexit flush runs before the email
+        # dispatcher's shutdown (atexit is LIFO), so the last batch's emails still go out.
+        app.before_request(submission_buffer.ensure_started)
+        atexit.register(submission_buffer.shutdown)
+        app.extensions['submission_buffer'] = submission_buffer
+    if app.config['SNAPSHOT_BACKEND']:
+        if not app.config['SNAPSHOT_IMAGE_URL_BASE'] and not app.extensions['image_storage'].direct_urls:
+            raise ValueError("SNAPSHOT_IMAGE_URL_BASE must be set to link images served by this API from the snapshot")
+        if app.config['STORAGE_BACKEND'] == 's3' and not app.config['STORAGE_PUBLIC_BASE_URL']:
+            app.logger.warning("The project snapshot links presigned image URLs, which expire; set STORAGE_PUBLIC_BASE_URL.")
+        app.extensions['snapshot_publisher'] = SnapshotPublisher(
+            app, create_snapshot_target(app.config), build_project_snapshot,
+            manifest_max_age=app.config['SNAPSHOT_MANIFEST_MAX_AGE'],
+            keep_versions=app.config['SNAPSHOT_KEEP_VERSIONS'],
+        )
+
+    app.register_blueprint(api)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(seed_admin_command)
+    app.cli.add_command(publish_snapshot_command)
+    app.cli.add_command(password_cli)
+    app.cli.add_command(submissions_cli)
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     is_debug_mode = os.environ.get('FLASK_DEBUG', '0').lower() in ['true', '1', 't']
@@ -0,0 +1,238 @@
+# metrics.py
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense, one series per label set."""
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['counts'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series['counts']):
+                lines.append(f"{self.name}_bucket{_labels(labels, le=_number(bound))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(labels, le='+Inf')} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(labels)} {_number(value)}")
+        return lines
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """Process-wide request, SQL and operation metrics (each gunicorn worker keeps its own)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Request latency by route.')
+        self.requests_total = Counter(
+            'http_requests_total', 'Requests by route, method and status.')
+        self.queries_per_request = Histogram(
+            'db_queries_per_request', 'SQL statements executed per request.', QUERY_COUNT_BUCKETS)
+        self.query_time_per_request = Histogram(
+            'db_query_seconds_per_request', 'Total SQL time per request by route.')
+        self.query_duration = Histogram(
+            'db_query_duration_seconds', 'Duration of individual SQL statements by route.')
+        self.operation_duration = Histogram(
+            'operation_duration_seconds', 'Duration of instrumented operations (serialization, hashing, email).')
+        self.slow_requests_total = Counter(
+            'http_slow_requests_total', 'Requests slower than SLOW_REQUEST_MS by route.')
+        self.rate_limited_total = Counter(
+            'http_rate_limited_total', 'Requests rejected by the rate limiter by endpoint.')
+        self.screened_submissions_total = Counter(
+            'contact_submissions_screened_total', 'Contact form submissions by spam filter outcome.')
+        self.revocation_check_failures_total = Counter(
+            'token_revocation_check_failures_total', 'JWT blocklist lookups that failed (token rejected) by backend.')
+
+    def observe_request(self, route, method, status, seconds, query_count, query_seconds):
+        with self._lock:
+            self.request_duration.observe((('route', route), ('method', method)), seconds)
+            self.requests_total.inc((('route', route), ('method', method), ('status', str(status))))
+            self.queries_per_request.observe((('route', route),), query_count)
+            self.query_time_per_request.observe((('route', route),), query_seconds)
+
+    def observe_query(self, route, seconds):
+        with self._lock:
+            self.query_duration.observe((('route', route),), seconds)
+
+    def observe_operation(self, operation, seconds):
+        with self._lock:
+            self.operation_duration.observe((('operation', operation),), seconds)
+
+    def count_slow_request(self, route):
+        with self._lock:
+            self.slow_requests_total.inc((('route', route),))
+
+    def count_rate_limited(self, endpoint):
+        with self._lock:
+            self.rate_limited_total.inc((('endpoint', endpoint),))
+
+    def count_screened_submission(self, outcome):
+        with self._lock:
+            self.screened_submissions_total.inc((('outcome', outcome),))
+
+    def count_revocation_check_failure(self, backend):
+        with self._lock:
+            self.revocation_check_failures_total.inc((('backend', backend),))
+
+    def render(self, extra_gauges=None):
+        """Prometheus text exposition format; extra_gauges is {name: value}."""
+        with self._lock:
+            lines = []
+            for metric in (self.request_duration, self.requests_total, self.queries_per_request,
+                           self.query_time_per_request, self.query_duration,
+                           self.operation_duration, self.slow_requests_total, self.rate_limited_total,
+                           self.screened_submissions_total, self.revocation_check_failures_total):
+                lines.extend(metric.render())
+        for name, value in (extra_gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def timed(operation):
+    """Records how long the block took under operation_duration_seconds{operation=...}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_operation(operation, time.perf_counter() - start)
+
+
+def _route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def instrument_engine(engine):
+    """Counts and times the SQL run on engine against the current request (see init_request_metrics)."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_start'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop('query_start', time.perf_counter())
+        if has_request_context() and 'metrics_start' in g:
+            g.metrics_query_count += 1
+            g.metrics_query_seconds += elapsed
+            metrics.observe_query(_route(), elapsed)
+
+
+def init_request_metrics(app, engine):
+    """
+    Times every request, counts the SQL it runs (via SQLAlchemy cursor events) and
+    logs requests slower than SLOW_REQUEST_MS. With PROFILE_SAMPLE_RATE > 0 a random
+    share of requests runs under cProfile and slow ones get their profile logged
+    (or written to PROFILE_DIR).
+    """
+    slow_seconds = app.config['SLOW_REQUEST_MS'] / 1000.0
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    profile_dir = app.config['PROFILE_DIR']
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        g.metrics_query_count = 0
+        g.metrics_query_seconds = 0.0
+        if sample_rate and random.random() < sample_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.metrics_profiler = profiler
+            except ValueError:
+                pass  # another request on this process is already being profiled
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_start' not in g:
+            return response
+        profiler = g.pop('metrics_profiler', None)
+        if profiler:
+            profiler.disable()
+        elapsed = time.perf_counter() - g.metrics_start
+        route = _route()
+        metrics.observe_request(route, request.method, response.status_code, elapsed,
+                                g.metrics_query_count, g.metrics_query_seconds)
+        if elapsed >= slow_seconds:
+            metrics.count_slow_request(route)
+            app.logger.warning(
+                f"Slow request {request.method} {request.path} ({route}): {elapsed * 1000:.1f} ms, "
+                f"{g.metrics_query_count} SQL statements in {g.metrics_query_seconds * 1000:.1f} ms"
+            )
+            if profiler:
+                _report_profile(app, profiler, route, profile_dir)
+        return response
+
+
+def _report_profile(app, profiler, route, profile_dir):
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        safe_route = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+        path = os.path.join(profile_dir, f"{safe_route}-{int(time.time() * 1000)}.prof")
+        profiler.dump_stats(path)
+        app.logger.warning(f"Profile written to {path}")
+        return
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(20)
+    app.logger.warning(f"Profile for slow request on {route}:\n{out.getvalue()}")
@@ -0,0 +1,284 @@
+# migrations.py
+"""
+Versioned schema migrations, applied in order by `flask db upgrade`.
+
+Each migration is (version, description, function(connection)) and runs in its own
+transaction together with its row in schema_migrations, under a lock that serializes
+concurrent upgrades (pg_advisory_xact_lock on Postgres, BEGIN IMMEDIATE on SQLite).
+Migrations must never be edited once released; add a new one instead, and keep them
+self-contained (no calls into application modules that may change later). The early
+ones check what already exists because databases created before versioning already
+have part of the schema.
+"""
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+# pg_advisory_xact_lock key shared by every `flask db upgrade` against the database.
+MIGRATION_LOCK_KEY = 7_270_163_411
+
+schema_migrations = sa.Table(
+    'schema_migrations', sa.MetaData(),
+    sa.Column('version', sa.Integer, primary_key=True),
+    sa.Column('description', sa.String(255), nullable=False),
+    sa.Column('applied_at', sa.DateTime, nullable=False),
+)
+
+
+def _column_names(conn, table):
+    return {column['name'] for column in sa.inspect(conn).get_columns(table)}
+
+
+def _index_names(conn, table):
+    return {index['name'] for index in sa.inspect(conn).get_indexes(table)}
+
+
+# --- Migrations ---
+def initial_schema(conn):
+    metadata = sa.MetaData()
+    sa.Table(
+        'admin_users', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('username', sa.String(80), unique=True, nullable=False),
+        sa.Column('password_hash', sa.String(256), nullable=False),
+    )
+    sa.Table(
+        'projects', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('description', sa.Text, nullable=True),
+        sa.Column('project_url', sa.String(255), nullable=True),
+        sa.Column('image_filename', sa.String(100), nullable=True),
+        sa.Column('date_added', sa.DateTime),
+    )
+    sa.Table(
+        'contact_submissions', metadata,
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('email', sa.String(120), nullable=False),
+        sa.Column('phone', sa.String(50), nullable=True),
+        sa.Column('message', sa.Text, nullable=False),
+        sa.Column('submission_date', sa.DateTime, nullable=False),
+    )
+    metadata.create_all(conn, checkfirst=True)
+
+
+def project_image_variants_and_listing_index(conn):
+    if 'image_variants' not in _column_names(conn, 'projects'):
+        conn.execute(sa.text('ALTER TABLE projects ADD COLUMN image_variants JSON'))
+    if 'ix_projects_date_added_id' not in _index_names(conn, 'projects'):
+        conn.execute(sa.text('CREATE INDEX ix_projects_date_added_id ON projects (date_added, id)'))
+
+
+def full_text_search(conn):
+    """Search columns/tables for search.py: tsvector + GIN on Postgres, FTS5 on SQLite."""
+    if conn.dialect.name == 'postgresql':
+        vectors = {
+            'projects': (
+                "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+            ),
+            'contact_submissions': (
+                "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(email, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(message, '')), 'B')"
+            ),
+        }
+        for table, expression in vectors.items():
+            if 'search_vector' not in _column_names(conn, table):
+                conn.execute(sa.text(
+                    f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                    f"GENERATED ALWAYS AS ({expression}) STORED"
+                ))
+            if f'ix_{table}_search_vector' not in _index_names(conn, table):
+                conn.execute(sa.text(f'CREATE INDEX ix_{table}_search_vector ON {table} USING GIN (search_vector)'))
+    elif conn.dialect.name == 'sqlite':
+        # External-content FTS5 tables kept in sync by triggers, then filled from existing rows.
+        fts_columns = {'projects': ['name', 'description'], 'contact_submissions': ['name', 'email', 'message']}
+        for table, columns in fts_columns.items():
+            fts = f'{table}_fts'
+            column_list = ', '.join(columns)
+            new_values = ', '.join(f'new.{column}' for column in columns)
+            old_values = ', '.join(f'old.{column}' for column in columns)
+            conn.execute(sa.text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column_list}, content='{table}', content_rowid='id')"
+            ))
+            conn.execute(sa.text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(sa.text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+            ))
+            conn.execute(sa.text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+            ))
+            conn.execute(sa.text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def contact_submissions_listing_index(conn):
+    if 'ix_contact_submissions_submission_date_id' not in _index_names(conn, 'contact_submissions'):
+        conn.execute(sa.text(
+            'CREATE INDEX ix_contact_submissions_submission_date_id ON contact_submissions (submission_date, id)'
+        ))
+
+
+def revoked_tokens(conn):
+    sa.Table(
+        'revoked_tokens', sa.MetaData(),
+        sa.Column('jti', sa.String(36), primary_key=True),
+        sa.Column('expires_at', sa.DateTime, nullable=False),
+    ).create(conn, checkfirst=True)
+
+
+def contact_submissions_buffer_id(conn):
+    if 'buffer_id' not in _column_names(conn, 'contact_submissions'):
+        conn.execute(sa.text('ALTER TABLE contact_submissions ADD COLUMN buffer_id VARCHAR(36)'))
+    if 'ix_contact_submissions_buffer_id' not in _index_names(conn, 'contact_submissions'):
+        conn.execute(sa.text('CREATE INDEX ix_contact_submissions_buffer_id ON contact_submissions (buffer_id)'))
+
+
+def _add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return datetime(month.year + years, month_index + 1, 1)
+
+
+def partition_contact_submissions(conn):
+    """
+    Postgres: rebuilds contact_submissions as a table range-partitioned by month on
+    submission_date (see retention.py), with a partition per month from the oldest row to
+    three months ahead plus a DEFAULT partition. The primary key becomes (id, submission_date),
+    as a partitioned table's keys must include the partition column; ids still come
+    from the same sequence. Other databases keep the plain table.
+    """
+    if conn.dialect.name != 'postgresql':
+        return
+    relkind = conn.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('contact_submissions')")).scalar()
+    if relkind == 'p':
+        return
+    columns = _column_names(conn, 'contact_submissions')
+    sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence('contact_submissions', 'id')")).scalar()
+    conn.execute(sa.text('ALTER TABLE contact_submissions RENAME TO contact_submissions_unpartitioned'))
+    conn.execute(sa.text(
+        'CREATE TABLE contact_submissions (LIKE contact_submissions_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED) '
+        'PARTITION BY RANGE (submission_date)'
+    ))
+    conn.execute(sa.text('CREATE TABLE contact_submissions_default PARTITION OF contact_submissions DEFAULT'))
+    oldest = conn.execute(sa.text('SELECT min(submission_date) FROM contact_submissions_unpartitioned')).scalar()
+    now = datetime.now(timezone.utc)
+    month = datetime((oldest or now).year, (oldest or now).month, 1)
+    last_month = _add_months(datetime(now.year, now.month, 1), 3)
+    while month <= last_month:
+        conn.execute(sa.text(
+            f"CREATE TABLE contact_submissions_{month:%Y_%m} PARTITION OF contact_submissions "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        ))
+        month = _add_months(month, 1)
+    column_list = ', '.join(sorted(columns - {'search_vector'}))  # generated, can't be inserted
+    conn.execute(sa.text(
+        f'INSERT INTO contact_submissions ({column_list}) SELECT {column_list} FROM contact_submissions_unpartitioned'
+    ))
+    if sequence:
+        conn.execute(sa.text(f'ALTER SEQUENCE {sequence} OWNED BY contact_submissions.id'))
+    conn.execute(sa.text('DROP TABLE contact_submissions_unpartitioned'))
+    conn.execute(sa.text('ALTER TABLE contact_submissions ADD PRIMARY KEY (id, submission_date)'))
+    conn.execute(sa.text(
+        'CREATE INDEX ix_contact_submissions_submission_date_id ON contact_submissions (submission_date, id)'
+    ))
+    conn.execute(sa.text('CREATE INDEX ix_contact_submissions_buffer_id ON contact_submissions (buffer_id)'))
+    if 'search_vector' in columns:
+        conn.execute(sa.text(
+            'CREATE INDEX ix_contact_submissions_search_vector ON contact_submissions USING GIN (search_vector)'
+        ))
+
+
+def contact_submissions_spam_flag(conn):
+    columns = _column_names(conn, 'contact_submissions')
+    if 'is_spam' not in columns:
+        conn.execute(sa.text('ALTER TABLE contact_submissions ADD COLUMN is_spam BOOLEAN NOT NULL DEFAULT false'))
+    if 'spam_reasons' not in columns:
+        conn.execute(sa.text('ALTER TABLE contact_submissions ADD COLUMN spam_reasons VARCHAR(255)'))
+
+
+def projects_date_added_not_null(conn):
+    """
+    Keyset pagination orders and compares on date_added, so rows without one broke it.
+    Backfills them with the migration time, then enforces NOT NULL (a trigger on SQLite,
+    which can't alter a column's constraints in place).
+    """
+    conn.execute(
+        sa.text('UPDATE projects SET date_added = :now WHERE date_added IS NULL'),
+        {'now': datetime.now(timezone.utc).replace(tzinfo=None)},
+    )
+    if conn.dialect.name == 'sqlite':
+        for event in ('INSERT', 'UPDATE OF date_added'):
+            name = 'projects_date_added_' + event.split()[0].lower()
+            conn.execute(sa.text(
+                f"CREATE TRIGGER IF NOT EXISTS {name} BEFORE {event} ON projects "
+                f"WHEN new.date_added IS NULL BEGIN SELECT RAISE(ABORT, 'projects.date_added may not be NULL'); END"
+            ))
+    else:
+        conn.execute(sa.text('ALTER TABLE projects ALTER COLUMN date_added SET NOT NULL'))
+
+
+MIGRATIONS = [
+    (1, 'Initial schema: admin_users, projects, contact_submissions', initial_schema),
+    (2, 'projects.image_variants and the (date_added, id) listing index', project_image_variants_and_listing_index),
+    (3, 'Full-text search: search_vector + GIN indexes (Postgres) or FTS5 tables (SQLite)', full_text_search),
+    (4, 'contact_submissions (submission_date, id) listing index', contact_submissions_listing_index),
+    (5, 'revoked_tokens blocklist for logout and refresh token rotation', revoked_tokens),
+    (6, 'contact_submissions.buffer_id for the submission write buffer', contact_submissions_buffer_id),
+    (7, 'Monthly range partitions of contact_submissions (Postgres)', partition_contact_submissions),
+    (8, 'contact_submissions.is_spam and spam_reasons for the spam filter', contact_submissions_spam_flag),
+    (9, 'projects.date_added NOT NULL for keyset pagination', projects_date_added_not_null),
+]
+
+
+# --- Runner ---
+def applied_versions(engine):
+    with engine.begin() as conn:
+        _lock(conn)  # two first-time upgrades would both try to create the table
+        schema_migrations.create(conn, checkfirst=True)
+        return {row.version for row in conn.execute(sa.select(schema_migrations.c.version))}
+
+
+def pending_migrations(engine):
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+def _lock(conn):
+    """Holds the migration lock until conn's transaction ends, so concurrent upgrades run one at a time."""
+    if conn.dialect.name == 'postgresql':
+        conn.execute(sa.text('SELECT pg_advisory_xact_lock(:key)'), {'key': MIGRATION_LOCK_KEY})
+    elif conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+def upgrade(engine, log=print):
+    """
+    Applies every pending migration in version order. Returns the versions applied.
+    Each one is re-checked under the lock, so one that another process applied while
+    this one waited is skipped rather than run twice.
+    """
+    applied = []
+    for version, description, migrate in pending_migrations(engine):
+        with engine.begin() as conn:
+            _lock(conn)
+            already_applied = conn.execute(
+                sa.select(schema_migrations.c.version).where(schema_migrations.c.version == version)
+            ).first()
+            if already_applied:
+                continue
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.now(timezone.utc),
+            ))
+        log(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,131 @@
+# passwords.py
+"""
+Admin password hashing with configurable cost (PASSWORD_HASH_METHOD):
+
+    scrypt:<n>:<r>:<p>              Werkzeug scrypt (the default, scrypt:32768:8:1)
+    pbkdf2:<hash>:<iterations>      Werkzeug PBKDF2, e.g. pbkdf2:sha256:1000000
+    argon2id:<time>:<memory KiB>:<parallelism>   Argon2id (needs argon2-cffi)
+
+Hashes carry their own parameters, so old hashes keep verifying after the method
+changes; needs_rehash() tells the login to upgrade them. calibrate() finds the cost
+that makes one verification take about a target time on this machine.
+"""
+import statistics
+import time
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+try:
+    import argon2
+except ImportError:  # Optional dependency, only needed for argon2id methods
+    argon2 = None
+
+ALGORITHMS = ('scrypt', 'pbkdf2', 'argon2id')
+
+
+def normalize_method(method):
+    """Fills in Werkzeug's defaults, so 'scrypt' and 'scrypt:32768:8:1' compare equal."""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    if name == 'argon2id':
+        time_cost, memory_cost, parallelism = map(int, args)
+        return f"argon2id:{time_cost}:{memory_cost}:{parallelism}"
+    raise ValueError(f"Unknown password hash method '{method}'")
+
+
+def _argon2_hasher(method):
+    if argon2 is None:
+        raise RuntimeError("PASSWORD_HASH_METHOD uses argon2id but argon2-cffi is not installed")
+    _, time_cost, memory_cost, parallelism = normalize_method(method).split(':')
+    return argon2.PasswordHasher(
+        time_cost=int(time_cost), memory_cost=int(memory_cost), parallelism=int(parallelism),
+        type=argon2.Type.ID,
+    )
+
+
+def hash_password(password, method):
+    if method.startswith('argon2id'):
+        return _argon2_hasher(method).hash(password)
+    return generate_password_hash(password, method=normalize_method(method))
+
+
+def verify_password(password_hash, password):
+    if password_hash.startswith('$argon2'):
+        if argon2 is None:
+            raise RuntimeError("Stored password hash is argon2 but argon2-cffi is not installed")
+        try:
+            return argon2.PasswordHasher().verify(password_hash, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+
+def needs_rehash(password_hash, method):
+    """
+    True when password_hash was made with another algorithm or other parameters than method.
+    Hashes whose parameters can't be parsed (legacy or unknown formats) always need one.
+    """
+    try:
+        if method.startswith('argon2id'):
+            return not password_hash.startswith('$argon2id$') or _argon2_hasher(method).check_needs_rehash(password_hash)
+        if password_hash.startswith('$argon2'):
+            return True
+        stored_method = normalize_method(password_hash.split('$', 1)[0])
+    except ValueError:  # includes argon2's InvalidHashError
+        return True
+    return stored_method != normalize_method(method)
+
+
+# --- Calibration ---
+def time_verify(method, repeat=3):
+    """Median seconds one verification with method takes here."""
+    password_hash = hash_password('calibration-password', method)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        verify_password(password_hash, 'calibration-password')
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def candidate_methods(algorithm, max_memory_mib=128):
+    """Methods of increasing cost for algorithm, within max_memory_mib per hash."""
+    if algorithm == 'scrypt':
+        n = 2 ** 14
+        while 128 * n * 8 <= max_memory_mib * 1024 * 1024:
+            yield f"scrypt:{n}:8:1"
+            n *= 2
+    elif algorithm == 'pbkdf2':
+        for iterations in (100_000, 200_000, 400_000, 600_000, 1_000_000, 1_500_000, 2_000_000, 3_000_000, 5_000_000):
+            yield f"pbkdf2:sha256:{iterations}"
+    elif algorithm == 'argon2id':
+        memory_cost = min(64 * 1024, max_memory_mib * 1024)
+        for time_cost in range(1, 11):
+            yield f"argon2id:{time_cost}:{memory_cost}:1"
+    else:
+        raise ValueError(f"Unknown password hash algorithm '{algorithm}'")
+
+
+def calibrate(algorithm, target_seconds, max_memory_mib=128, on_result=None):
+    """
+    Times candidate_methods() from cheapest up and returns (method, seconds) for the
+    costliest one that verifies within target_seconds (the cheapest one if none does).
+    on_result(method, seconds) is called for every candidate timed.
+    """
+    chosen = None
+    for method in candidate_methods(algorithm, max_memory_mib):
+        seconds = time_verify(method)
+        if on_result:
+            on_result(method, seconds)
+        if chosen is not None and seconds > target_seconds:
+            break
+        chosen = (method, seconds)
+        if seconds > target_seconds:
+            break
+    return chosen
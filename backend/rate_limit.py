@@ -0,0 +1,135 @@
+# rate_limit.py
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify, request
+
+from metrics import metrics
+
+
+def parse_rate(value):
+    """
+    "<burst>/<seconds>" -> (capacity, refill tokens per second): up to <burst> requests
+    at once, refilled completely over <seconds>. Empty values mean no limit (None).
+    """
+    if not value:
+        return None
+    burst, _, seconds = value.partition('/')
+    capacity, period = int(burst), float(seconds)
+    if capacity < 1 or period <= 0:
+        raise ValueError(f"Invalid rate limit '{value}'")
+    return capacity, capacity / period
+
+
+# --- Backends ---
+class MemoryRateLimitBackend:
+    """Token buckets in this process; every gunicorn worker limits on its own."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        """Takes a token from key's bucket. Returns (allowed, seconds until one is available)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            # Least recently used buckets go first; a dropped bucket just starts full again.
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+
+class RedisRateLimitBackend:
+    """
+    Token buckets in Redis, shared by every worker and instance. Each check is one
+    atomic script call using the Redis server clock; idle buckets expire once full.
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, client, key_prefix='ratelimit'):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(self.SCRIPT)
+
+    def consume(self, key, capacity, refill_rate):
+        allowed, retry_after = self._script(keys=[f"{self.key_prefix}:{key}"], args=[capacity, refill_rate])
+        return bool(allowed), float(retry_after)
+
+
+def create_rate_limit_backend(config):
+    backend = config['RATE_LIMIT_BACKEND']
+    if backend == 'memory':
+        return MemoryRateLimitBackend()
+    if backend == 'redis':
+        import redis  # Optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+        client = redis.Redis.from_url(
+            config['RATE_LIMIT_REDIS_URL'], socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        return RedisRateLimitBackend(client)
+    if backend == 'fakeredis':
+        import fakeredis  # In-process Redis for local runs (needs fakeredis[lua])
+        return RedisRateLimitBackend(fakeredis.FakeRedis())
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'")
+
+
+# --- Request Hook ---
+def init_rate_limiting(app, limits):
+    """
+    Throttles the endpoints in limits ({endpoint: "<burst>/<seconds>" config key}) per
+    client IP. Runs as a before_request hook, so throttled requests get a 429 with
+    Retry-After before the view touches the database or hashes anything. If the
+    backend is unreachable requests are let through rather than failing the site.
+    """
+    rates = {endpoint: parse_rate(app.config[config_key]) for endpoint, config_key in limits.items()}
+    rates = {endpoint: rate for endpoint, rate in rates.items() if rate}
+    backend = create_rate_limit_backend(app.config)
+    app.extensions['rate_limiter'] = backend
+
+    @app.before_request
+    def enforce_rate_limits():
+        rate = rates.get(request.endpoint)
+        if rate is None or request.method == 'OPTIONS' or not app.config['RATE_LIMIT_ENABLED']:
+            return None
+        try:
+            allowed, retry_after = backend.consume(f"{request.endpoint}:{request.remote_addr}", *rate)
+        except Exception as e:
+            app.logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return None
+        if allowed:
+            return None
+        metrics.count_rate_limited(request.endpoint)
+        app.logger.warning(f"Rate limited {request.remote_addr} on {request.endpoint}")
+        response = jsonify({"message": "Too many requests. Please try again later."})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
@@ -0,0 +1,229 @@
+# retention.py
+"""
+Retention for contact_submissions. On Postgres the table is range-partitioned by month
+(contact_submissions_YYYY_MM, plus contact_submissions_default for rows outside them;
+migration 7). `flask submissions retention`, run daily from cron:
+
+  1. creates the partitions of the current and the next few months;
+  2. archives every month older than the retention period to a gzipped NDJSON file
+     (contact_submissions-YYYY-MM.ndjson.gz), then drops its partition (on SQLite or an
+     unpartitioned table, deletes its rows).
+
+Each month is archived and removed in one transaction, after its archive is written, so
+a failed run leaves the rows in place and the next run rewrites the same archive.
+"""
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+
+PARENT = 'contact_submissions'
+DEFAULT_PARTITION = 'contact_submissions_default'
+PARTITION_NAME = re.compile(rf'^{PARENT}_([0-9]{{4}})_([0-9]{{2}})$')
+GENERATED_COLUMNS = {'search_vector'}
+
+submissions = sa.table(
+    PARENT,
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('email', sa.String),
+    sa.column('phone', sa.String),
+    sa.column('message', sa.Text),
+    sa.column('submission_date', sa.DateTime),
+    sa.column('buffer_id', sa.String),
+    sa.column('is_spam', sa.Boolean),
+    sa.column('spam_reasons', sa.String),
+)
+
+
+# --- Months ---
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return datetime(month.year + years, month_index + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def in_month(month):
+    return sa.and_(submissions.c.submission_date >= month, submissions.c.submission_date < add_months(month, 1))
+
+
+# --- Partitions (Postgres) ---
+def is_partitioned(conn):
+    if conn.dialect.name != 'postgresql':
+        return False
+    relkind = conn.execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {'table': PARENT}
+    ).scalar()
+    return relkind == 'p'
+
+
+def month_partitions(conn):
+    """{month: partition name} of the monthly partitions that exist."""
+    names = conn.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table)"
+    ), {'table': PARENT}).scalars()
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_month_partition(conn, month):
+    """Creates month's partition, moving rows of that month that landed in the default partition into it."""
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    moved = conn.execute(sa.text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE submission_date >= :start AND submission_date < :end RETURNING *"
+    ), bounds).mappings().all()
+    conn.execute(sa.text(
+        f"CREATE TABLE {partition_name(month)} PARTITION OF {PARENT} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    ))
+    if moved:
+        rows = [{key: value for key, value in row.items() if key not in GENERATED_COLUMNS} for row in moved]
+        columns = list(rows[0])
+        conn.execute(sa.text(
+            f"INSERT INTO {PARENT} ({', '.join(columns)}) VALUES ({', '.join(':' + column for column in columns)})"
+        ), rows)
+
+
+def ensure_month_partitions(conn, first_month, last_month):
+    """Creates the missing partitions from first_month to last_month. Returns their names."""
+    existing = month_partitions(conn)
+    created = []
+    month = first_month
+    while month <= last_month:
+        if month not in existing:
+            create_month_partition(conn, month)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+# --- Archive Targets ---
+def archive_name(month):
+    return f"{PARENT}-{month:%Y-%m}.ndjson.gz"
+
+
+class LocalArchiveTarget:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, name, fileobj):
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.part', delete=False) as tmp:
+            shutil.copyfileobj(fileobj, tmp)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp.name, os.path.join(self.directory, name))
+
+
+class S3ArchiveTarget:
+    def __init__(self, bucket, prefix='archive/contact-submissions', endpoint_url=None, region=None, client=None):
+        if client is None:
+            import boto3  # Optional dependency, only needed for CONTACT_SUBMISSION_ARCHIVE_BACKEND=s3
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def write(self, name, fileobj):
+        self.client.upload_fileobj(
+            fileobj, self.bucket, f"{self.prefix}{name}",
+            ExtraArgs={'ContentType': 'application/x-ndjson', 'ContentEncoding': 'gzip'},
+        )
+
+
+def create_archive_target(config):
+    backend = config['CONTACT_SUBMISSION_ARCHIVE_BACKEND']
+    if backend == 'local':
+        return LocalArchiveTarget(config['CONTACT_SUBMISSION_ARCHIVE_DIR'])
+    if backend == 's3':
+        return S3ArchiveTarget(
+            config['S3_BUCKET'],
+            prefix=config['CONTACT_SUBMISSION_ARCHIVE_S3_PREFIX'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            region=config['S3_REGION'],
+        )
+    raise ValueError(f"Unknown CONTACT_SUBMISSION_ARCHIVE_BACKEND '{backend}'")
+
+
+# --- Retention ---
+def archive_month(conn, month, target, serialize, batch_size=1000):
+    """Writes month's rows, oldest first, to target as gzipped NDJSON. Returns the row count (0 writes nothing)."""
+    result = conn.execute(
+        sa.select(submissions).where(in_month(month)).order_by(submissions.c.submission_date, submissions.c.id),
+        execution_options={'yield_per': batch_size},
+    )
+    count = 0
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode='wb') as archive:
+            for rows in result.partitions():
+                archive.write(''.join(json.dumps(serialize(row)) + '\n' for row in rows).encode())
+                count += len(rows)
+        if count:
+            tmp.seek(0)
+            target.write(archive_name(month), tmp)
+    return count
+
+
+def expired_months(conn, cutoff, partitioned):
+    """Months before cutoff that still have rows or a partition."""
+    months = set()
+    after = datetime.min
+    while True:
+        # One index seek per month with rows, skipping the empty ones.
+        oldest = conn.execute(sa.select(sa.func.min(submissions.c.submission_date)).where(
+            submissions.c.submission_date >= after, submissions.c.submission_date < cutoff
+        )).scalar()
+        if oldest is None:
+            break
+        months.add(month_start(oldest))
+        after = add_months(month_start(oldest), 1)
+    if partitioned:
+        months.update(month for month in month_partitions(conn) if month < cutoff)
+    return sorted(months)
+
+
+def run_retention(engine, target, serialize, retention_months, months_ahead=3, now=None, log=print):
+    """
+    Creates upcoming partitions, then archives and removes the months older than
+    retention_months (0 keeps everything). Returns the number of rows archived.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    with engine.begin() as conn:
+        partitioned = is_partitioned(conn)
+        if partitioned:
+            for name in ensure_month_partitions(conn, current, add_months(current, months_ahead)):
+                log(f"Created partition {name}.")
+    if retention_months <= 0:
+        return 0
+
+    cutoff = add_months(current, -retention_months)
+    with engine.connect() as conn:
+        months = expired_months(conn, cutoff, partitioned)
+    archived = 0
+    for month in months:
+        with engine.begin() as conn:
+            count = archive_month(conn, month, target, serialize)
+            if partitioned and month in month_partitions(conn):
+                conn.execute(sa.text(f"DROP TABLE {partition_name(month)}"))
+            # Rows of the month in the default partition, or in an unpartitioned table.
+            conn.execute(sa.delete(submissions).where(in_month(month)))
+        archived += count
+        log(f"Archived {count} submissions from {month:%Y-%m}" + (f" to {archive_name(month)}." if count else "."))
+    return archived
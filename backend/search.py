@@ -0,0 +1,115 @@
+# search.py
+"""
+Full-text search for the project and contact-submission listings (?q=).
+
+On Postgres each table has a generated, GIN-indexed search_vector column (migration 3)
+queried with websearch_to_tsquery (OR-ed across the text search configs the column
+mixes, so contact names and emails indexed with 'simple' still match), ranked with ts_rank_cd and highlighted with
+ts_headline. On SQLite the same migration keeps FTS5 tables in sync with triggers and
+queries rank with bm25() and highlight with snippet(). Statements return the requested
+columns plus `rank` (higher is better) and a raw `snippet`; render_snippet() turns the
+snippet into escaped HTML with <mark> around the matches.
+"""
+import html
+import re
+
+import sqlalchemy as sa
+
+SEARCH_CONFIG = 'english'  # config for stemming the prose columns and for ts_headline
+MAX_QUERY_LENGTH = 200
+HEADLINE_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=12, MaxFragments=2, FragmentDelimiter=" … "'
+_MARK = re.compile(r'(</?mark>)')
+
+# table -> (FTS5 table, bm25 column weights in FTS5 column order, column highlighted on Postgres,
+#           text search configs the Postgres search_vector was built with; see migrations.full_text_search)
+SEARCHABLE = {
+    'projects': ('projects_fts', (10.0, 1.0), 'description', (SEARCH_CONFIG,)),
+    'contact_submissions': ('contact_submissions_fts', (10.0, 10.0, 1.0), 'message', (SEARCH_CONFIG, 'simple')),
+}
+
+
+def search_supported(dialect):
+    return dialect in ('postgresql', 'sqlite')
+
+
+def fts5_query(q):
+    """Plain user input -> FTS5 query matching all of its words (operators are not interpreted)."""
+    words = re.findall(r'\w[\w@.\'-]*', q)
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def pg_tsquery(table_name, q):
+    """
+    websearch_to_tsquery(q) for each config table_name's search_vector mixes, OR-ed together:
+    lexemes from to_tsvector('simple', ...) are unstemmed, so an 'english' query alone misses them.
+    """
+    configs = SEARCHABLE[table_name][3]
+    tsquery = sa.func.websearch_to_tsquery(configs[0], q)
+    for config in configs[1:]:
+        tsquery = tsquery.op('||')(sa.func.websearch_to_tsquery(config, q))
+    return tsquery
+
+
+def search_statement(dialect, table, q, columns, limit, offset=0):
+    """
+    SELECT of columns (from table) for the rows matching q, best match first, with
+    `rank` and `snippet` columns added.
+    """
+    fts_table, weights, headline_column, _ = SEARCHABLE[table.name]
+    if dialect == 'postgresql':
+        tsquery = pg_tsquery(table.name, q)
+        vector = sa.literal_column(f'{table.name}.search_vector')
+        rank = sa.func.ts_rank_cd(vector, tsquery).label('rank')
+        matches = (
+            sa.select(*columns, table.c[headline_column].label('headline_source'), rank)
+            .where(vector.op('@@')(tsquery))
+            .order_by(rank.desc(), table.c.id.desc())
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        # ts_headline is expensive, so it only runs on the page of results.
+        snippet = sa.func.ts_headline(
+            SEARCH_CONFIG, sa.func.coalesce(matches.c.headline_source, ''), tsquery, HEADLINE_OPTIONS
+        ).label('snippet')
+        return (
+            sa.select(*[matches.c[column.key] for column in columns], matches.c.rank, snippet)
+            .order_by(matches.c.rank.desc(), matches.c.id.desc())
+        )
+    if dialect == 'sqlite':
+        fts = sa.table(fts_table, sa.column('rowid'))
+        fts_ref = sa.literal_column(fts_table)
+        # bm25() is lower-is-better; negate it so rank sorts the same way on both databases.
+        rank = (-sa.func.bm25(fts_ref, *weights)).label('rank')
+        snippet = sa.func.snippet(fts_ref, -1, '<mark>', '</mark>', ' … ', 24).label('snippet')
+        return (
+            sa.select(*columns, rank, snippet)
+            .select_from(table.join(fts, fts.c.rowid == table.c.id))
+            .where(fts_ref.op('MATCH')(fts5_query(q)))
+            .order_by(rank.desc(), table.c.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+    raise ValueError(f"Full-text search is not available on '{dialect}' databases")
+
+
+def search_count_statement(dialect, table, q):
+    """COUNT of the rows matching q."""
+    if dialect == 'postgresql':
+        vector = sa.literal_column(f'{table.name}.search_vector')
+        return sa.select(sa.func.count()).select_from(table).where(
+            vector.op('@@')(pg_tsquery(table.name, q))
+        )
+    if dialect == 'sqlite':
+        fts_table = SEARCHABLE[table.name][0]
+        return sa.select(sa.func.count()).select_from(sa.table(fts_table)).where(
+            sa.literal_column(fts_table).op('MATCH')(fts5_query(q))
+        )
+    raise ValueError(f"Full-text search is not available on '{dialect}' databases")
+
+
+def render_snippet(snippet):
+    """Escapes a raw snippet (the rows hold user-submitted text), keeping only the <mark> tags."""
+    if not snippet:
+        return None
+    return ''.join(part if _MARK.fullmatch(part) else html.escape(part) for part in _MARK.split(snippet))
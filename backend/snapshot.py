@@ -0,0 +1,170 @@
+# snapshot.py
+"""
+Static snapshot of the public project list, for the frontend to load from static
+hosting or a CDN instead of calling /api/projects:
+
+    <target>/projects.<version>.json   {"version", "generated_at", "projects": [...]}, immutable
+    <target>/projects.json             {"version", "path", "generated_at", "count"}, short-lived
+
+The version is a hash of the project list, so an unchanged list republishes the same
+file. The manifest is written last, after the file it points to, and the previous
+versions are kept for a while so clients holding an older manifest can still load them.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from metrics import timed
+
+MANIFEST_NAME = 'projects.json'
+VERSIONED_PREFIX = 'projects.'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def versioned_name(version):
+    return f"{VERSIONED_PREFIX}{version}.json"
+
+
+def render_snapshot(projects):
+    """projects -> (version, versioned file body, manifest body)."""
+    projects_json = json.dumps(projects, sort_keys=True, separators=(',', ':'))
+    version = hashlib.sha256(projects_json.encode()).hexdigest()[:16]
+    generated_at = datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+    body = json.dumps({'version': version, 'generated_at': generated_at, 'projects': projects}, sort_keys=True)
+    manifest = json.dumps({
+        'version': version,
+        'path': versioned_name(version),
+        'generated_at': generated_at,
+        'count': len(projects),
+    }, sort_keys=True)
+    return version, body.encode(), manifest.encode()
+
+
+# --- Targets ---
+class LocalSnapshotTarget:
+    """Writes the snapshot into a directory served as static files (e.g. the frontend's public/)."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, name, body, cache_control):
+        # Static file servers pick their own caching headers; writes are atomic renames.
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix='.part', delete=False) as tmp:
+            tmp.write(body)
+        os.chmod(tmp.name, 0o644)  # temp files are private; the static file server must be able to read it
+        os.replace(tmp.name, os.path.join(self.directory, name))
+
+    def versions(self):
+        """Versioned files, oldest first."""
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(VERSIONED_PREFIX) and name.endswith('.json') and name != MANIFEST_NAME
+        ]
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.directory, name)))
+
+    def delete(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+
+class S3SnapshotTarget:
+    """Writes the snapshot to an S3-compatible bucket (behind a CDN or public)."""
+
+    def __init__(self, bucket, prefix='snapshot', endpoint_url=None, region=None, client=None):
+        if client is None:
+            import boto3  # Optional dependency, only needed for SNAPSHOT_BACKEND=s3
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def write(self, name, body, cache_control):
+        self.client.put_object(
+            Bucket=self.bucket, Key=f"{self.prefix}{name}", Body=body,
+            ContentType='application/json', CacheControl=cache_control,
+        )
+
+    def versions(self):
+        objects = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}{VERSIONED_PREFIX}"):
+            objects.extend(page.get('Contents', []))
+        names = [(obj['Key'][len(self.prefix):], obj['LastModified']) for obj in objects]
+        return [name for name, _ in sorted(names, key=lambda item: item[1]) if name != MANIFEST_NAME]
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=f"{self.prefix}{name}")
+
+
+def create_snapshot_target(config):
+    backend = config['SNAPSHOT_BACKEND']
+    if backend == 'local':
+        return LocalSnapshotTarget(config['SNAPSHOT_DIR'])
+    if backend == 's3':
+        return S3SnapshotTarget(
+            config['SNAPSHOT_S3_BUCKET'] or config['S3_BUCKET'],
+            prefix=config['SNAPSHOT_S3_PREFIX'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            region=config['S3_REGION'],
+        )
+    raise ValueError(f"Unknown SNAPSHOT_BACKEND '{backend}'")
+
+
+# --- Publisher ---
+class SnapshotPublisher:
+    """
+    Rebuilds and uploads the snapshot on a background thread after project changes.
+    Changes that arrive while a build runs trigger exactly one more build, so a burst
+    of admin edits never queues up a build per edit.
+    """
+
+    def __init__(self, app, target, build_projects, manifest_max_age=60, keep_versions=5):
+        self.app = app
+        self.target = target
+        self.build_projects = build_projects
+        self.manifest_cache_control = f'public, max-age={manifest_max_age}'
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._running = False
+
+    def request_publish(self):
+        """Schedules a rebuild; returns immediately."""
+        with self._lock:
+            self._dirty = True
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, name='snapshot-publisher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._running = False
+                    return
+                self._dirty = False
+            try:
+                with self.app.app_context():
+                    self.publish()
+            except Exception as e:
+                self.app.logger.error(f"Failed to publish the project snapshot: {e}", exc_info=True)
+
+    def publish(self):
+        """Builds and writes the snapshot now (needs an app context). Returns its version."""
+        with timed('snapshot_publish'):
+            version, body, manifest = render_snapshot(self.build_projects())
+            self.target.write(versioned_name(version), body, IMMUTABLE_CACHE_CONTROL)
+            self.target.write(MANIFEST_NAME, manifest, self.manifest_cache_control)
+            current = versioned_name(version)
+            stale = [name for name in self.target.versions() if name != current]
+            for name in stale[:max(0, len(stale) - self.keep_versions + 1)]:
+                self.target.delete(name)
+        self.app.logger.info(f"Published project snapshot {version}.")
+        return version
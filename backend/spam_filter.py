@@ -0,0 +1,246 @@
+# spam_filter.py
+"""
+Pre-commit screening of contact form submissions, before anything is written or emailed:
+
+  - duplicates: the same email + message seen again within the dedup window is
+    acknowledged but dropped;
+  - spam score: a filled honeypot field, a missing, forged, expired, reused or too-fresh
+    timing token (a signed single-use nonce issued by /api/form_data when the form mounts)
+    and any SPAM_SCORERS hooks add up to a score; submissions at or above the threshold are
+    stored as spam in batches, without a notification email. A bad token alone reaches the
+    threshold. Used nonces are remembered in the dedup backend until they expire.
+
+A scorer hook is a function taking the submitted form data (dict) and returning None or
+(score, reason), named in SPAM_SCORERS as 'module:function'.
+"""
+import hashlib
+import logging
+import queue
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from itsdangerous import BadSignature, SignatureExpired, TimestampSigner
+
+HONEYPOT_FIELD = 'contact_me_by_fax'
+TOKEN_FIELD = 'form_token'
+
+# Score added by each check; SPAM_SCORE_THRESHOLD (default 1.0) decides what is spam.
+# Token problems score at least the threshold whatever it is set to.
+HONEYPOT_SCORE = 1.0
+TOKEN_FAILURE_SCORE = 1.0
+
+
+def content_hash(data):
+    """Hash of the normalized email and message, so case and whitespace changes still match."""
+    normalize = lambda value: re.sub(r'\s+', ' ', str(value or '')).strip().lower()
+    content = f"{normalize(data.get('email'))}\n{normalize(data.get('message'))}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+# --- Dedup Backends ---
+class MemoryDedupSet:
+    """Recently seen keys in this process, expiring after their TTL; oldest dropped past max_keys."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._expires = OrderedDict()  # key -> expires_at
+        self._lock = threading.Lock()
+
+    def seen(self, key, ttl):
+        """Records key for ttl seconds. Returns True if it was already recorded."""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._expires.pop(key, None)
+            if expires_at is not None and expires_at > now:
+                self._expires[key] = expires_at
+                return True
+            self._expires[key] = now + ttl
+            while len(self._expires) > self.max_keys:
+                self._expires.popitem(last=False)
+            return False
+
+    def forget(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+
+
+class RedisDedupSet:
+    """Recently seen keys in Redis (SET NX with a TTL), shared by every worker and instance."""
+
+    def __init__(self, client, key_prefix='form-dedup'):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def seen(self, key, ttl):
+        return not self.client.set(f"{self.key_prefix}:{key}", 1, nx=True, ex=max(1, int(ttl)))
+
+    def forget(self, key):
+        self.client.delete(f"{self.key_prefix}:{key}")
+
+
+def create_dedup_backend(config):
+    backend = config['SPAM_DEDUP_BACKEND']
+    if backend == 'memory':
+        return MemoryDedupSet()
+    if backend == 'redis':
+        import redis  # Optional dependency, only needed for SPAM_DEDUP_BACKEND=redis
+        client = redis.Redis.from_url(
+            config['SPAM_DEDUP_REDIS_URL'], socket_timeout=0.5, socket_connect_timeout=0.5
+        )
+        return RedisDedupSet(client)
+    if backend == 'fakeredis':
+        import fakeredis  # In-process Redis for local runs
+        return RedisDedupSet(fakeredis.FakeRedis())
+    raise ValueError(f"Unknown SPAM_DEDUP_BACKEND '{backend}'")
+
+
+# --- Screening ---
+class SpamFilter:
+    def __init__(self, secret_key, dedup, threshold=1.0, dedup_seconds=600, min_fill_seconds=3.0,
+                 token_max_age=3600, scorers=(), logger=None):
+        self.signer = TimestampSigner(secret_key, salt='contact-form-token')
+        self.dedup = dedup
+        self.threshold = threshold
+        self.dedup_seconds = dedup_seconds
+        self.min_fill_seconds = min_fill_seconds
+        self.token_max_age = token_max_age
+        self.scorers = list(scorers)
+        self.logger = logger or logging.getLogger(__name__)
+
+    def issue_token(self):
+        """Single-use timing token for a form that was just rendered."""
+        return self.signer.sign(secrets.token_urlsafe(16)).decode()
+
+    def _token_check(self, token):
+        failure = max(TOKEN_FAILURE_SCORE, self.threshold)
+        if not token:
+            return failure, 'missing_token'
+        try:
+            nonce, issued_at = self.signer.unsign(token, max_age=self.token_max_age, return_timestamp=True)
+        except SignatureExpired:
+            return failure, 'expired_token'
+        except BadSignature:
+            return failure, 'forged_token'
+        try:
+            reused = self.dedup.seen(self._nonce_key(nonce), self.token_max_age)
+        except Exception as e:
+            self.logger.warning(f"Form token reuse check failed, skipping it: {e}")
+            reused = False
+        if reused:
+            return failure, 'reused_token'
+        if time.time() - issued_at.timestamp() < self.min_fill_seconds:
+            return failure, 'too_fast'
+        return None
+
+    @staticmethod
+    def _nonce_key(nonce):
+        return f"token:{nonce.decode() if isinstance(nonce, bytes) else nonce}"
+
+    def score(self, data):
+        """(score, reasons) of data."""
+        checks = []
+        if data.get(HONEYPOT_FIELD):
+            checks.append((HONEYPOT_SCORE, 'honeypot'))
+        checks.append(self._token_check(data.get(TOKEN_FIELD)))
+        for scorer in self.scorers:
+            try:
+                checks.append(scorer(data))
+            except Exception as e:
+                self.logger.warning(f"Spam scorer {getattr(scorer, '__name__', scorer)} failed, skipping it: {e}")
+        checks = [check for check in checks if check]
+        return sum(score for score, _ in checks), [reason for _, reason in checks]
+
+    def is_duplicate(self, data):
+        """True when the same content was submitted within the dedup window. Lets submissions through if the backend fails."""
+        try:
+            return self.dedup.seen(content_hash(data), self.dedup_seconds)
+        except Exception as e:
+            self.logger.warning(f"Submission dedup check failed, allowing submission: {e}")
+            return False
+
+    def forget(self, data):
+        """
+        Takes data out of the dedup window and releases its form token, so a retry after a
+        failed store isn't dropped as a duplicate or scored as a reused token.
+        """
+        try:
+            self.dedup.forget(content_hash(data))
+            token = data.get(TOKEN_FIELD)
+            if token:
+                self.dedup.forget(self._nonce_key(self.signer.unsign(token)))
+        except BadSignature:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Could not clear the dedup entry of a failed submission: {e}")
+
+    def check(self, data):
+        """{"duplicate", "spam", "score", "reasons"} for a validated submission."""
+        score, reasons = self.score(data)
+        return {
+            'duplicate': self.is_duplicate(data),
+            'spam': score >= self.threshold,
+            'score': score,
+            'reasons': reasons,
+        }
+
+
+# --- Spam Storage ---
+class SpamBatchWriter:
+    """
+    Stores spam submissions in batches from a background thread: store_records(records)
+    runs in an app context every flush_interval seconds or once batch_size are queued.
+    The queue is in memory and bounded; during a flood the newest spam is dropped.
+    """
+
+    def __init__(self, app, store_records, batch_size=200, flush_interval=5.0, max_queue=10000):
+        self.app = app
+        self.store_records = store_records
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='spam-batch-writer', daemon=True)
+            self._thread.start()
+
+    def add(self, record):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        while True:
+            records = []
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not records:
+                return
+            try:
+                with self.app.app_context():
+                    self.store_records(records)
+            except Exception as e:
+                self.app.logger.error(f"Storing {len(records)} spam submissions failed, dropping them: {e}", exc_info=True)
@@ -0,0 +1,121 @@
+# storage.py
+import errno
+import os
+import shutil
+import tempfile
+import mimetypes
+from contextlib import contextmanager
+
+# Uploaded filenames never change content, so stored objects can be cached forever.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class LocalStorage:
+    """Keeps uploaded images in a directory on this host, served by the /uploads route."""
+
+    direct_urls = False  # url() never returns a URL
+
+    def __init__(self, root, scratch_dir=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # Partial uploads and processing output stay out of the served directory, but on its
+        # filesystem (a hidden sibling by default) so put() is an atomic rename.
+        root = os.path.abspath(root)
+        self.scratch_dir = scratch_dir or os.path.join(os.path.dirname(root), f".{os.path.basename(root)}-tmp")
+        os.makedirs(self.scratch_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, local_path, key):
+        """Move a finished local file into storage under key."""
+        try:
+            os.replace(local_path, self.path(key))
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # scratch_dir is on another filesystem: copy under a hidden name, then rename.
+            staging = os.path.join(self.root, f".{key}.incoming")
+            shutil.copyfile(local_path, staging)
+            os.replace(staging, self.path(key))
+            os.remove(local_path)
+
+    def delete(self, key):
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self.path(key)
+
+    def url(self, key):
+        """Direct URL for key, or None when it has to be served by the app."""
+        return None
+
+
+class S3Storage:
+    """
+    Keeps uploaded images in an S3-compatible bucket (AWS, MinIO, R2, ...). Objects are
+    uploaded with multipart transfers and linked either through public_base_url (a CDN
+    or public bucket) or as presigned GET URLs, so image bytes never pass through Flask.
+    """
+
+    direct_urls = True
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None,
+                 public_base_url=None, presign_expires=3600, client=None):
+        if client is None:
+            import boto3  # Optional dependency, only needed for STORAGE_BACKEND=s3
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.public_base_url = public_base_url.rstrip('/') if public_base_url else None
+        self.presign_expires = presign_expires
+        self.scratch_dir = None
+
+    def object_key(self, key):
+        return f"{self.prefix}{key}"
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put(self, local_path, key):
+        """Upload a finished local file (multipart for large files) and remove the local copy."""
+        self.client.upload_file(local_path, self.bucket, self.object_key(key), ExtraArgs={
+            'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream',
+            'CacheControl': IMMUTABLE_CACHE_CONTROL,
+        })
+        os.remove(local_path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    @contextmanager
+    def local_copy(self, key):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, os.path.basename(key))
+            self.client.download_file(self.bucket, self.object_key(key), path)
+            yield path
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def url(self, key):
+        if self.public_base_url:
+            return f"{self.public_base_url}/{self.object_key(key)}"
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket, 'Key': self.object_key(key)},
+            ExpiresIn=self.presign_expires,
+        )
@@ -0,0 +1,175 @@
+# submission_buffer.py
+"""
+Write-behind buffer for contact submissions. The form endpoint appends each validated
+submission to a local SQLite file (WAL, synchronous=FULL, so an accepted submission
+survives a crash) and returns; a background thread moves them to the real database in
+batches, every flush_interval seconds or as soon as batch_size are waiting.
+
+Every worker of a host can share one buffer file. Flushers claim rows with a lease, so
+two workers never flush the same rows at once, and rows claimed by a worker that died
+are picked up again once the lease runs out. Each row carries a buffer_id the store
+function uses to skip rows that were already stored before a crash, so a retried batch
+doesn't create duplicates.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import timed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_submissions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    buffer_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_until REAL
+)
+"""
+
+
+class SubmissionBuffer:
+    """
+    store_records(records) runs in an app context with a list of payload dicts (each with
+    its 'buffer_id') and must store them all or raise; failed batches are retried on the
+    next flush.
+    """
+
+    def __init__(self, app, path, store_records, batch_size=200, flush_interval=1.0, lease_seconds=60):
+        self.app = app
+        self.path = path
+        self.store_records = store_records
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lease_seconds = lease_seconds
+        self.flushed = 0
+        self.flush_failures = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._appended = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=FULL')
+        return conn
+
+    def _conn(self):
+        """This thread's connection; reopened after a fork, as SQLite connections can't be shared across one."""
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def append(self, payload):
+        """Durably buffers payload (a JSON-serializable dict). Returns its buffer_id."""
+        buffer_id = str(uuid.uuid4())
+        self._conn().execute(
+            'INSERT INTO pending_submissions (buffer_id, payload) VALUES (?, ?)',
+            (buffer_id, json.dumps(payload)),
+        )
+        self.ensure_started()
+        with self._lock:
+            self._appended += 1
+            if self._appended >= self.batch_size:
+                self._wake.set()
+        return buffer_id
+
+    def pending(self):
+        return self._conn().execute('SELECT count(*) FROM pending_submissions').fetchone()[0]
+
+    # --- Flushing ---
+    def ensure_started(self):
+        """Starts the flusher thread of this process, which also picks up rows left from before a restart."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._stopping or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name='submission-buffer-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                self._appended = 0
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"Flushing buffered contact submissions failed: {e}", exc_info=True)
+            if stopping:
+                return
+
+    def flush(self):
+        """Stores everything waiting in the buffer, one batch at a time. Returns the number stored."""
+        stored = 0
+        while True:
+            claim, rows = self._claim()
+            if not rows:
+                return stored
+            records = [dict(json.loads(payload), buffer_id=buffer_id) for _, buffer_id, payload in rows]
+            try:
+                with self.app.app_context(), timed('submission_buffer_flush'):
+                    self.store_records(records)
+            except Exception:
+                self.flush_failures += 1
+                self._release(claim)
+                raise
+            self._conn().execute('DELETE FROM pending_submissions WHERE claimed_by = ?', (claim,))
+            self.flushed += len(rows)
+            stored += len(rows)
+            if len(rows) < self.batch_size:
+                return stored
+
+    def _claim(self):
+        claim = str(uuid.uuid4())
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT seq, buffer_id, payload FROM pending_submissions '
+                'WHERE claimed_until IS NULL OR claimed_until < ? ORDER BY seq LIMIT ?',
+                (now, self.batch_size),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    'UPDATE pending_submissions SET claimed_by = ?, claimed_until = ? WHERE seq = ?',
+                    [(claim, now + self.lease_seconds, seq) for seq, _, _ in rows],
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return claim, rows
+
+    def _release(self, claim):
+        self._conn().execute(
+            'UPDATE pending_submissions SET claimed_by = NULL, claimed_until = NULL WHERE claimed_by = ?', (claim,)
+        )
+
+    def shutdown(self, timeout=5.0):
+        """Stops the flusher after one last flush."""
+        with self._lock:
+            self._stopping = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        return {'pending': self.pending(), 'flushed': self.flushed, 'flush_failures': self.flush_failures}
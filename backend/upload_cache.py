@@ -0,0 +1,87 @@
+# upload_cache.py
+import threading
+from collections import OrderedDict
+
+
+class UploadMemoryCache:
+    """
+    Byte-bounded LRU of uploaded image bodies for the /uploads route, so the most requested
+    images are served from memory instead of being re-read from (possibly network) storage.
+    A file is only admitted on its admit_after-th request (recent requests are tracked in a
+    bounded list), so one-off requests for cold files keep going through sendfile and don't
+    push the hot set out. Files larger than max_file_bytes are never cached. Entries keep the
+    file's (mtime_ns, size) as 'stat' so callers can tell when the file changed underneath.
+    """
+
+    def __init__(self, max_bytes, max_file_bytes, admit_after=2, max_tracked=4096):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.admit_after = admit_after
+        self.max_tracked = max_tracked
+        self._entries = OrderedDict()  # filename -> entry
+        self._requests = OrderedDict()  # filename -> requests while not cached
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.admissions = 0
+        self.evictions = 0
+
+    def get(self, filename):
+        """Returns the cached entry for filename, or None (counted as a miss)."""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def should_admit(self, filename, size):
+        """Records a miss for filename; True once it has been requested often enough to cache."""
+        if size > self.max_file_bytes:
+            return False
+        with self._lock:
+            count = self._requests.pop(filename, 0) + 1
+            if count >= self.admit_after:
+                return True
+            self._requests[filename] = count
+            while len(self._requests) > self.max_tracked:
+                self._requests.popitem(last=False)
+            return False
+
+    def put(self, filename, body, etag, last_modified, mimetype, stat=None):
+        entry = {'body': body, 'etag': etag, 'last_modified': last_modified, 'mimetype': mimetype, 'stat': stat}
+        with self._lock:
+            previous = self._entries.pop(filename, None)
+            if previous is not None:
+                self._bytes -= len(previous['body'])
+            self._entries[filename] = entry
+            self._bytes += len(body)
+            self.admissions += 1
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted['body'])
+                self.evictions += 1
+        return entry
+
+    def discard(self, filename):
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._bytes -= len(entry['body'])
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'admissions': self.admissions,
+                'evictions': self.evictions,
+            }
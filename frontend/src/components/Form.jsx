@@ -6,12 +6,17 @@ const FormComponent = () => {
     email: "",
     phone: "",
     message: "",
+    contact_me_by_fax: "", // Honeypot: hidden from people, so only bots fill it in
   };
   
   const [data, setData] = useState(initialFormState);
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submitStatus, setSubmitStatus] = useState(null); // 'success', 'error', or null
   const [errorMessage, setErrorMessage] = useState("");
+  // Single-use timing token from the mount ping; the backend treats forms sent back too quickly,
+  // or with a token that was already used, as spam
+  const [formToken, setFormToken] = useState(null);
+  const [tokenRequest, setTokenRequest] = useState(0); // bumped to fetch a new token after a submission
 
   // Note: Consider if this useEffect is needed - it sends empty data on mount
   useEffect(() => {
@@ -32,11 +37,12 @@ const FormComponent = () => {
       .then((res) => res.json())
       .then((data) => {
         console.log("Initial ping response:", data);
+        setFormToken(data.form_token || null);
       })
       .catch((err) => {
         console.error("Error on initial ping:", err);
       });
-  }, []);
+  }, [tokenRequest]);
 
   const handleChange = (e) => {
     setData({
@@ -82,7 +88,7 @@ const FormComponent = () => {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify(data),
+        body: JSON.stringify({ ...data, form_token: formToken }),
       });
 
       const responseData = await response.json();
@@ -91,6 +97,7 @@ const FormComponent = () => {
         console.log("Form submitted successfully:", responseData);
         setSubmitStatus('success');
         setData(initialFormState); // Clear the form
+        setTokenRequest((n) => n + 1); // The token was used up; get one for the next message
         
         // Clear success message after 5 seconds
         setTimeout(() => {
@@ -164,6 +171,16 @@ const FormComponent = () => {
             rows="5"
           ></textarea>
         </label>
+        <label aria-hidden="true" style={{ position: 'absolute', left: '-10000px', width: '1px', height: '1px', overflow: 'hidden' }}>
+          <input
+            type="text"
+            name="contact_me_by_fax"
+            value={data.contact_me_by_fax}
+            onChange={handleChange}
+            tabIndex={-1}
+            autoComplete="off"
+          />
+        </label>
         
         {/* Status Messages */}
         {submitStatus === 'success' && (
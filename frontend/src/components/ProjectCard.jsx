@@ -31,7 +31,10 @@ const ProjectCard = ({ project, onDelete, onEdit }) => { // Added onEdit prop
                 {project.image_url && (
                     <img
                         src={project.image_url}
+                        srcSet={project.srcset || undefined}
+                        sizes="(max-width: 700px) 100vw, 640px"
                         alt={project.name}
+                        loading="lazy"
                         className="project-card-image"
                     />
                 )}
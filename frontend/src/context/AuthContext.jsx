@@ -5,10 +5,30 @@ import React, { createContext, useState, useContext, useEffect, useCallback } fr
 import { useNavigate } from 'react-router-dom';
 
 const AuthContextInternal = createContext(null);
+const AUTH_API_BASE_URL = 'https://portfolio-website-backend-749y.onrender.com/api/admin';
+// Access tokens are renewed this long before they expire.
+const REFRESH_MARGIN_MS = 60 * 1000;
+
+// Expiry of a JWT in milliseconds since the epoch, or null if it can't be read.
+const tokenExpiresAt = (jwt) => {
+    try {
+        const payload = JSON.parse(atob(jwt.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+        return payload.exp ? payload.exp * 1000 : null;
+    } catch (e) {
+        return null;
+    }
+};
+
+const clearStoredSession = () => {
+    localStorage.removeItem('authToken');
+    localStorage.removeItem('authRefreshToken');
+    localStorage.removeItem('authUser');
+};
 
 export const AuthProvider = ({ children }) => {
     const [user, setUser] = useState(null);
     const [token, setToken] = useState(null); // Initialize as null, load from localStorage in effect
+    const [refreshToken, setRefreshToken] = useState(null);
     const [isLoadingAuth, setIsLoadingAuth] = useState(true); // Start true until initial check is done
     const navigate = useNavigate(); // Make sure AuthProvider is a child of <Router>
 
@@ -20,6 +40,7 @@ export const AuthProvider = ({ children }) => {
 
         if (storedToken) {
             setToken(storedToken); // Update state if different
+            setRefreshToken(localStorage.getItem('authRefreshToken'));
             if (storedUserJson) {
                 try {
                     setUser(JSON.parse(storedUserJson));
@@ -56,41 +77,100 @@ export const AuthProvider = ({ children }) => {
 
             if (response.ok && data.access_token && data.user) {
                 localStorage.setItem('authToken', data.access_token);
+                localStorage.setItem('authRefreshToken', data.refresh_token);
                 localStorage.setItem('authUser', JSON.stringify(data.user));
                 
                 // CRITICAL: Set state to trigger re-render of consumers
                 setToken(data.access_token);
+                setRefreshToken(data.refresh_token);
                 setUser(data.user);
                 setIsLoadingAuth(false); // Finished loading
 
                 return true; // Indicate login success
             } else {
                 // Clear any potentially stored items on failed login attempt
-                localStorage.removeItem('authToken');
-                localStorage.removeItem('authUser');
+                clearStoredSession();
                 setToken(null);
+                setRefreshToken(null);
                 setUser(null);
                 setIsLoadingAuth(false);
                 throw new Error(data.message || `Login failed with status: ${response.status}`);
             }
         } catch (error) {
-            localStorage.removeItem('authToken');
-            localStorage.removeItem('authUser');
+            clearStoredSession();
             setToken(null);
+            setRefreshToken(null);
             setUser(null);
             setIsLoadingAuth(false);
             throw error; // Re-throw for the component to handle
         }
     }, []); // No dependencies means this function's definition doesn't change unless AuthProvider remounts
 
-    const logout = useCallback(() => {
-        localStorage.removeItem('authToken');
-        localStorage.removeItem('authUser');
+    const clearSession = useCallback(() => {
+        clearStoredSession();
         setToken(null);
+        setRefreshToken(null);
         setUser(null);
         setIsLoadingAuth(false); // User is no longer loading an auth state
+    }, []);
+
+    const logout = useCallback(() => {
+        if (token) {
+            // Revoke both tokens server-side; the local session is cleared either way.
+            fetch(`${AUTH_API_BASE_URL}/logout`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` },
+                body: JSON.stringify({ refresh_token: refreshToken }),
+            }).catch(() => {});
+        }
+        clearSession();
         navigate('/'); // Navigate to login page after logout (ensure this route exists)
-    }, [navigate]); // navigate is a dependency
+    }, [token, refreshToken, clearSession, navigate]);
+
+    // Trades the refresh token for a new token pair, so an active session never has to log in again.
+    const refreshSession = useCallback(async () => {
+        // Another tab may already have rotated the refresh token (each one works only once).
+        const currentRefreshToken = localStorage.getItem('authRefreshToken') || refreshToken;
+        if (!currentRefreshToken) return;
+        try {
+            const response = await fetch(`${AUTH_API_BASE_URL}/refresh`, {
+                method: 'POST',
+                headers: { 'Authorization': `Bearer ${currentRefreshToken}` },
+            });
+            if (!response.ok) {
+                if (response.status === 401 || response.status === 422) {
+                    clearSession(); // refresh token expired or revoked: log in again
+                }
+                return;
+            }
+            const data = await response.json();
+            localStorage.setItem('authToken', data.access_token);
+            localStorage.setItem('authRefreshToken', data.refresh_token);
+            setToken(data.access_token);
+            setRefreshToken(data.refresh_token);
+        } catch (error) {
+            console.error("Token refresh failed:", error);
+        }
+    }, [refreshToken, clearSession]);
+
+    // Schedule the next refresh shortly before the access token expires.
+    useEffect(() => {
+        if (!token || !refreshToken) return undefined;
+        const expiresAt = tokenExpiresAt(token);
+        if (!expiresAt) return undefined;
+        const timer = setTimeout(refreshSession, Math.max(0, expiresAt - Date.now() - REFRESH_MARGIN_MS));
+        return () => clearTimeout(timer);
+    }, [token, refreshToken, refreshSession]);
+
+    // Pick up tokens refreshed (or a logout) in another tab.
+    useEffect(() => {
+        const onStorage = (event) => {
+            if (event.key === 'authToken') setToken(event.newValue);
+            if (event.key === 'authRefreshToken') setRefreshToken(event.newValue);
+        };
+        window.addEventListener('storage', onStorage);
+        return () => window.removeEventListener('storage', onStorage);
+    }, []);
 
     // Memoize the context value to prevent unnecessary re-renders of consumers
     // if AuthProvider re-renders for reasons not related to these specific values.
@@ -100,8 +180,9 @@ export const AuthProvider = ({ children }) => {
         isLoadingAuth,
         login,
         logout,
+        refreshSession,
         isAuthenticated: !!token, // Derived from the token state
-    }), [user, token, isLoadingAuth, login, logout]);
+    }), [user, token, isLoadingAuth, login, logout, refreshSession]);
 
 
     return (
@@ -59,4 +59,14 @@ export const getAdminProjectById = async (projectId, token) => {
 
 export const updateAdminProject = async (projectId, formData, token) => {
     return adminRequest(`/api/admin/projects/${projectId}`, 'PUT', formData, token, true);
-};
\ No newline at end of file
+};
+
+// Batch operations run in one request and one transaction; the response has a result per item.
+// operations: { create: [{ name, description, project_url }], update: [{ id, ...fields }], delete: [id] }
+export const batchAdminProjects = async (operations, token) => {
+    return adminRequest('/api/admin/projects/batch', 'POST', operations, token);
+};
+
+export const deleteContactSubmissions = async (submissionIds, token) => {
+    return adminRequest('/api/admin/contact-submissions/batch', 'POST', { delete: submissionIds }, token);
+};
@@ -1,7 +1,32 @@
 // src/services/portfolioService.js
 const API_BASE_URL = 'https://portfolio-website-backend-749y.onrender.com'; // Your Flask backend URL
+// Where the backend publishes the static project snapshot (SNAPSHOT_BACKEND), e.g. a CDN URL.
+// When it is set, public pages load projects from there and only call the API if it is unavailable.
+const SNAPSHOT_BASE_URL = import.meta.env.VITE_SNAPSHOT_BASE_URL?.replace(/\/$/, '');
+
+const getSnapshotProjects = async () => {
+    // The manifest is small and short-lived; the versioned file it points to never changes.
+    const manifestResponse = await fetch(`${SNAPSHOT_BASE_URL}/projects.json`, { cache: 'no-cache' });
+    if (!manifestResponse.ok) {
+        throw new Error(`Snapshot manifest HTTP error ${manifestResponse.status}`);
+    }
+    const manifest = await manifestResponse.json();
+    const response = await fetch(`${SNAPSHOT_BASE_URL}/${manifest.path}`);
+    if (!response.ok) {
+        throw new Error(`Snapshot HTTP error ${response.status}`);
+    }
+    const snapshot = await response.json();
+    return snapshot.projects;
+};
 
 export const getPublicProjects = async () => {
+    if (SNAPSHOT_BASE_URL) {
+        try {
+            return await getSnapshotProjects();
+        } catch (error) {
+            console.warn("Project snapshot unavailable, falling back to the API:", error);
+        }
+    }
     try {
         const response = await fetch(`${API_BASE_URL}/api/projects`);
         if (!response.ok) {
@@ -14,4 +39,4 @@ export const getPublicProjects = async () => {
         console.error("Error fetching public projects:", error);
         throw error; // Re-throw to be handled by the component
     }
-};
\ No newline at end of file
+};